@@ -3,38 +3,212 @@ Flask API for Credit Card Default Prediction
 """
 
 import streamlit as st
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import pickle
+import json
+import contextlib
+import io
 import os
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from cascade import parse_band
+from coalescer import PredictionCoalescer
+from prediction_cache import PredictionCache, row_key
+from model_bundle import build_bundle, bundle_from_artifact, model_version
+from model_artifact import ARTIFACT_PATH
+from model_registry import build_registry
+import training
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork mode, the thread lock is enough
+    fcntl = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow bodies are optional
+    pa = None
+
+try:
+    import orjson
+except ImportError:  # Faster JSON encoding of batch responses is optional
+    orjson = None
+
 app = Flask(__name__)
 CORS(app)
 
-# Global variables for model and scaler
-model = None
-scaler = None
-feature_columns = None
-@st.cache_resource
-def load_model():
-    """Load the trained model and scaler"""
-    global model, scaler, feature_columns
+# The model bundle currently used for predictions. Requests read this
+# reference once and use that bundle throughout; installs replace it with a
+# fully built bundle in a single assignment.
+current_bundle = None
+bundle_install_lock = threading.Lock()
+
+# Optional multi-model registry (see model_registry.py), swapped the same way
+current_registry = None
+
+# Feature descriptions based on the dataset
+FEATURE_DESCRIPTIONS = {
+    'LIMIT_BAL': 'Credit limit amount',
+    'SEX': 'Gender (1=male, 2=female)',
+    'EDUCATION': 'Education level (1=graduate school, 2=university, 3=high school, 4=others)',
+    'MARRIAGE': 'Marital status (1=married, 2=single, 3=others)',
+    'AGE': 'Age in years',
+    'PAY_0': 'Repayment status in September',
+    'PAY_2': 'Repayment status in August',
+    'PAY_3': 'Repayment status in July',
+    'PAY_4': 'Repayment status in June',
+    'PAY_5': 'Repayment status in May',
+    'PAY_6': 'Repayment status in April',
+    'BILL_AMT1': 'Bill statement amount in September',
+    'BILL_AMT2': 'Bill statement amount in August',
+    'BILL_AMT3': 'Bill statement amount in July',
+    'BILL_AMT4': 'Bill statement amount in June',
+    'BILL_AMT5': 'Bill statement amount in May',
+    'BILL_AMT6': 'Bill statement amount in April',
+    'PAY_AMT1': 'Previous payment amount in September',
+    'PAY_AMT2': 'Previous payment amount in August',
+    'PAY_AMT3': 'Previous payment amount in July',
+    'PAY_AMT4': 'Previous payment amount in June',
+    'PAY_AMT5': 'Previous payment amount in May',
+    'PAY_AMT6': 'Previous payment amount in April'
+}
+
+# Inference backend: 'fused' (flattened forest with the scaler folded into its
+# thresholds), 'compiled' (flattened forest + separate scaling) or 'sklearn'
+INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'fused').lower()
+
+# Two-stage cascade (see cascade.py): "low,high" band of screening P(default)
+# within which the full forest decides, e.g. CASCADE_BAND=0.1,0.6. Off when unset
+CASCADE_BAND = parse_band(os.getenv('CASCADE_BAND', ''))
+
+# Memory-mapped model artifact, preferred over the pickle when it is current
+MODEL_ARTIFACT_PATH = os.getenv('MODEL_ARTIFACT_PATH', ARTIFACT_PATH)
+
+# Directory holding new labelled data files for incremental training
+TRAINING_DATA_DIR = os.getenv('TRAINING_DATA_DIR', 'new_data')
+
+# Multi-model suite served by /api/models/*
+MODEL_SUITE_PATH = os.getenv('MODEL_SUITE_PATH', training.SUITE_PATH)
+
+def pack_record(data, columns):
+    """Pack a single JSON record into a float64 row in `columns` order"""
+    row = np.empty((1, len(columns)), dtype=np.float64)
+    values = row[0]
+    for i, name in enumerate(columns):
+        values[i] = data[name]
+    return row
+
+# Opt-in micro-batching of concurrent /api/predict calls: wait up to
+# PREDICT_COALESCE_MS milliseconds or PREDICT_COALESCE_MAX_ROWS rows
+PREDICT_COALESCE_MS = float(os.getenv('PREDICT_COALESCE_MS', '0'))
+PREDICT_COALESCE_MAX_ROWS = int(os.getenv('PREDICT_COALESCE_MAX_ROWS', '64'))
+coalescer = None
+if PREDICT_COALESCE_MS > 0:
+    coalescer = PredictionCoalescer(
+        max_wait_ms=PREDICT_COALESCE_MS,
+        max_batch_size=PREDICT_COALESCE_MAX_ROWS
+    )
+
+# LRU/TTL cache of /api/predict results, keyed by feature row and model
+# version. PREDICT_CACHE_SIZE=0 turns it off
+PREDICT_CACHE_SIZE = int(os.getenv('PREDICT_CACHE_SIZE', '10000'))
+PREDICT_CACHE_TTL = float(os.getenv('PREDICT_CACHE_TTL', '300'))
+prediction_cache = None
+if PREDICT_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(max_entries=PREDICT_CACHE_SIZE, ttl_seconds=PREDICT_CACHE_TTL)
+
+def install_model(model_data, version=None, source=None):
+    """Build, warm up and atomically publish a new model bundle
+
+    The new bundle is built completely before it replaces the current one,
+    so in-flight requests keep using the bundle they started with.
+    """
+    bundle = build_bundle(
+        model_data,
+        engine_kind=INFERENCE_ENGINE,
+        feature_descriptions=FEATURE_DESCRIPTIONS,
+        version=version,
+        source=source,
+        cascade_band=CASCADE_BAND
+    )
+    return publish_bundle(bundle)
+
+def publish_bundle(bundle):
+    """Swap a fully built bundle in as the one used for predictions"""
+    global current_bundle
+    
+    with bundle_install_lock:
+        current_bundle = bundle
+    # Keys include the model version, so old entries could never be hit again
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    print(f"Model version {bundle.version} is now serving")
+    return bundle
+
+def artifact_is_current():
+    """True when the memory-mapped artifact exists and is not older than the pickle"""
+    if INFERENCE_ENGINE == 'sklearn' or not os.path.exists(MODEL_ARTIFACT_PATH):
+        return False
+    if not os.path.exists(training.MODEL_PATH):
+        return True
+    return os.path.getmtime(MODEL_ARTIFACT_PATH) >= os.path.getmtime(training.MODEL_PATH)
+
+def reload_registry():
+    """Load the multi-model suite from disk (if trained) and swap it in"""
+    global current_registry
     
+    if not os.path.exists(MODEL_SUITE_PATH):
+        return False
     try:
+        with open(MODEL_SUITE_PATH, 'rb') as f:
+            payload = f.read()
+        registry = build_registry(pickle.loads(payload), version=model_version(payload), source=MODEL_SUITE_PATH)
+        
+        with bundle_install_lock:
+            current_registry = registry
+        print(f"Model registry {registry.version} is now serving: {', '.join(registry.names)}")
+        return True
+    except Exception as e:
+        print(f"Error loading model registry: {e}")
+        return False
+
+def reload_model():
+    """Load the model bundle (and the model registry, if any) from disk and swap it in"""
+    reload_registry()
+    try:
+        # Prefer the memory-mapped artifact: no unpickling, and its pages
+        # are shared by every process that maps the same file
+        if artifact_is_current():
+            try:
+                bundle = bundle_from_artifact(
+                    MODEL_ARTIFACT_PATH,
+                    engine_kind=INFERENCE_ENGINE,
+                    feature_descriptions=FEATURE_DESCRIPTIONS,
+                    cascade_band=CASCADE_BAND
+                )
+            except ValueError as e:
+                # e.g. an artifact written by an older format version
+                print(f"Model artifact unusable ({e}); loading the pickle instead")
+            else:
+                publish_bundle(bundle)
+                print("Model loaded successfully!")
+                return True
+        
         # Check if model file exists
-        if os.path.exists('credit_card_model.pkl'):
-            with open('credit_card_model.pkl', 'rb') as f:
-                model_data = pickle.load(f)
+        if os.path.exists(training.MODEL_PATH):
+            with open(training.MODEL_PATH, 'rb') as f:
+                payload = f.read()
+            model_data = pickle.loads(payload)
             
-            model = model_data['model']
-            scaler = model_data['scaler']
-            feature_columns = model_data['feature_columns']
+            install_model(model_data, version=model_version(payload), source=training.MODEL_PATH)
             
             print("Model loaded successfully!")
             return True
@@ -45,60 +219,264 @@ def load_model():
         print(f"Error loading model: {e}")
         return False
 
-def train_model_from_notebook():
-    """Train model using the same pipeline as in the notebook"""
-    global model, scaler, feature_columns
+def watch_model_files(interval=2.0):
+    """Reload the model whenever the files on disk change
+
+    Used by multi-process serving: a model trained or reloaded through one
+    worker is written to disk, and every other worker picks it up here.
+    """
+    def signature():
+        return tuple(
+            os.path.getmtime(path) if os.path.exists(path) else None
+            for path in (training.MODEL_PATH, MODEL_ARTIFACT_PATH, MODEL_SUITE_PATH)
+        )
     
+    def watch():
+        last = signature()
+        while True:
+            time.sleep(interval)
+            current = signature()
+            if current != last:
+                last = current
+                reload_model()
+    
+    threading.Thread(target=watch, name='model-watcher', daemon=True).start()
+
+@st.cache_resource
+def load_model():
+    """Load the trained model and scaler"""
+    return reload_model()
+
+# Background training jobs, run one at a time in a worker process so the
+# serving threads keep answering predictions during a fit. Job state lives in
+# one JSON file per job under TRAINING_JOBS_DIR, so every pre-fork worker
+# sees the same jobs; a lock file keeps submissions one at a time.
+TRAINING_JOBS_DIR = os.getenv('TRAINING_JOBS_DIR', '.training_jobs')
+MAX_TRACKED_TRAINING_JOBS = 20
+training_jobs_lock = threading.Lock()
+training_executor = None
+training_progress = None
+
+@contextlib.contextmanager
+def training_jobs_locked():
+    """Exclusive access to the job files, across threads and worker processes"""
+    with training_jobs_lock:
+        os.makedirs(TRAINING_JOBS_DIR, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(TRAINING_JOBS_DIR, '.lock'), 'a') as lock_file:
+            # Released when the file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+def training_job_path(job_id):
+    return os.path.join(TRAINING_JOBS_DIR, f'{job_id}.json')
+
+def read_training_job(job_id):
+    """Stored state of a job, or None"""
+    # Job ids are uuid4 hex strings; anything else is not a job (or a path)
+    if not isinstance(job_id, str) or len(job_id) != 32 or any(c not in '0123456789abcdef' for c in job_id):
+        return None
     try:
-        # Read the dataset (same as notebook)
-        df = pd.read_csv('UCI_Credit_Card.csv')
-        
-        # Drop ID column
-        df = df.drop('ID', axis=1)
-        
-        # Separate features and target variable
-        X = df.drop('default.payment.next.month', axis=1)
-        y = df['default.payment.next.month']
-        
-        # Split data into training and testing sets
-        from sklearn.model_selection import train_test_split
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Standardize numerical features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Create and train Random Forest model (best performing from notebook)
-        model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
-        model.fit(X_train_scaled, y_train)
-        
-        # Store feature columns
-        feature_columns = X.columns.tolist()
-        
-        # Evaluate model
-        from sklearn.metrics import accuracy_score, classification_report
-        y_pred = model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
-        
-        print(f"Model trained successfully! Accuracy: {accuracy:.4f}")
+        with open(training_job_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def write_training_job(job):
+    """Atomically store a job's state (call with training_jobs_locked held)"""
+    path = training_job_path(job['job_id'])
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(job, f)
+    os.replace(tmp_path, path)
+
+def list_training_jobs():
+    """All stored jobs, oldest first"""
+    if not os.path.isdir(TRAINING_JOBS_DIR):
+        return []
+    jobs = [read_training_job(name[:-len('.json')]) for name in os.listdir(TRAINING_JOBS_DIR)
+            if name.endswith('.json')]
+    return sorted((job for job in jobs if job is not None), key=lambda job: job['submitted_at'])
+
+def expire_orphaned_job(job):
+    """Fail an unfinished job whose server process has exited (call with the lock held)
+
+    The process that submits a job runs it and records its progress. If
+    that process is gone (e.g. a recycled pre-fork worker), nobody will
+    ever finish the job.
+    """
+    if job['state'] not in ('queued', 'running') or job['server_pid'] == os.getpid():
+        return job
+    try:
+        os.kill(job['server_pid'], 0)
+        return job
+    except PermissionError:
+        return job
+    except ProcessLookupError:
+        pass
+    job.update({
+        'state': 'failed',
+        'error': 'The server process running this job exited before it finished',
+        'finished_at': time.time()
+    })
+    write_training_job(job)
+    return job
+
+def update_training_job(job_id, **changes):
+    with training_jobs_locked():
+        job = read_training_job(job_id)
+        if job is not None:
+            job.update(changes)
+            write_training_job(job)
+
+def get_training_executor():
+    """Create the training process pool on first use"""
+    global training_executor, training_progress
+    
+    with training_jobs_lock:
+        if training_executor is None:
+            context = multiprocessing.get_context('spawn')
+            training_progress = context.Queue()
+            training_executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=training.init_worker,
+                initargs=(training_progress,)
+            )
+            threading.Thread(target=drain_training_progress, name='training-progress', daemon=True).start()
+    return training_executor
+
+def shutdown_training_executor():
+    """Stop the training process pool (lets a running job finish first)
+
+    Pre-fork workers exit with os._exit, so the pool's process would
+    otherwise be left behind.
+    """
+    with training_jobs_lock:
+        executor = training_executor
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def drain_training_progress():
+    """Copy progress reports from the worker process into the job files"""
+    while True:
+        job_id, stage, fraction = training_progress.get()
+        with training_jobs_locked():
+            job = read_training_job(job_id)
+            if job is None or job['state'] not in ('queued', 'running'):
+                continue
+            if job['state'] == 'queued':
+                job['state'] = 'running'
+                job['started_at'] = time.time()
+            job['stage'] = stage
+            job['progress'] = round(fraction, 3)
+            write_training_job(job)
+
+def finish_training_job(job_id, future, suite):
+    """Install the trained bundle (or record the failure) when a job ends"""
+    try:
+        metrics = future.result()
         
-        # Save the model
-        model_data = {
-            'model': model,
-            'scaler': scaler,
-            'feature_columns': feature_columns
+        if suite:
+            if not reload_registry():
+                raise RuntimeError(f'Trained models could not be loaded from {MODEL_SUITE_PATH}')
+            version = current_registry.version
+        else:
+            # The worker saved both the pickle and the artifact; load from disk
+            # so the memory-mapped artifact is what gets served
+            if not reload_model():
+                raise RuntimeError(f'Trained model could not be loaded from {training.MODEL_PATH}')
+            version = current_bundle.version
+        print(f"Training job {job_id} finished. Accuracy: {metrics['accuracy']:.4f}")
+        update = {
+            'state': 'succeeded',
+            'stage': 'done',
+            'progress': 1.0,
+            'metrics': metrics,
+            'model_version': version
         }
-        
-        with open('credit_card_model.pkl', 'wb') as f:
-            pickle.dump(model_data, f)
-        
-        print("Model saved successfully!")
-        return True
-        
     except Exception as e:
-        print(f"Error training model: {e}")
-        return False
+        print(f"Training job {job_id} failed: {e}")
+        update = {'state': 'failed', 'error': str(e)}
+    
+    update_training_job(job_id, finished_at=time.time(), **update)
+
+def submit_training_job(search=False, data_file=None, suite=None, model_type='random_forest'):
+    """Queue a background training job; returns (job, created)
+
+    Only one job runs at a time (across all server processes), so a queued
+    or running job is returned instead of starting a second one. With
+    `search=True` the job runs a hyperparameter search before fitting the
+    final model. With a `data_file` (in TRAINING_DATA_DIR) the current
+    model is grown on that file's rows instead of being refitted on the
+    full dataset. With `suite` (a list of model names) the multi-model
+    registry is trained. `model_type` picks the main model family.
+    """
+    executor = get_training_executor()
+    
+    with training_jobs_locked():
+        jobs = [expire_orphaned_job(job) for job in list_training_jobs()]
+        for job in jobs:
+            if job['state'] in ('queued', 'running'):
+                return job, False
+        
+        job_id = uuid.uuid4().hex
+        write_training_job({
+            'job_id': job_id,
+            'state': 'queued',
+            'stage': 'queued',
+            'search': bool(search),
+            'data_file': data_file,
+            'suite': suite,
+            'model_type': model_type,
+            'progress': 0.0,
+            'metrics': None,
+            'model_version': None,
+            'error': None,
+            'server_pid': os.getpid(),
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        })
+        # Forget the oldest finished jobs
+        finished = [job['job_id'] for job in jobs if job['finished_at'] is not None]
+        for jid in finished[:max(0, len(jobs) + 1 - MAX_TRACKED_TRAINING_JOBS)]:
+            os.remove(training_job_path(jid))
+    
+    if suite is not None:
+        future = executor.submit(
+            training.run_training_job, job_id, training.DATASET_PATH, MODEL_SUITE_PATH,
+            suite=suite
+        )
+    elif data_file is not None:
+        future = executor.submit(
+            training.run_training_job, job_id, os.path.join(TRAINING_DATA_DIR, data_file),
+            training.MODEL_PATH, MODEL_ARTIFACT_PATH, incremental=True
+        )
+    else:
+        future = executor.submit(
+            training.run_training_job, job_id, training.DATASET_PATH, training.MODEL_PATH, MODEL_ARTIFACT_PATH,
+            search, model_type=model_type
+        )
+    future.add_done_callback(lambda f: finish_training_job(job_id, f, suite is not None))
+    return get_training_job(job_id), True
+
+def get_training_job(job_id):
+    """Snapshot of a training job with its duration so far"""
+    with training_jobs_locked():
+        job = read_training_job(job_id)
+        if job is None:
+            return None
+        job = expire_orphaned_job(job)
+    
+    if job['started_at'] is not None:
+        end = job['finished_at'] or time.time()
+        job['duration_seconds'] = round(end - job['started_at'], 3)
+    else:
+        job['duration_seconds'] = None
+    return job
 
 @app.route('/')
 def home():
@@ -109,8 +487,13 @@ def home():
         'endpoints': {
             'health': 'GET /api/health',
             'train': 'POST /api/train',
+            'train_status': 'GET /api/train/<job_id>',
+            'reload': 'POST /api/reload',
             'predict': 'POST /api/predict',
             'batch_predict': 'POST /api/batch_predict',
+            'stream_predict': 'POST /api/stream_predict',
+            'models': 'GET /api/models',
+            'models_predict': 'POST /api/models/predict',
             'features': 'GET /api/features'
         },
         'documentation': 'See README.md for detailed API documentation'
@@ -119,28 +502,73 @@ def home():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    bundle = current_bundle
+    health = {
         'status': 'healthy',
-        'model_loaded': model is not None,
+        'model_loaded': bundle is not None,
+        'model_version': bundle.version if bundle is not None else None,
         'message': 'Credit Card Default Prediction API is running'
-    })
+    }
+    if coalescer is not None:
+        health['coalescer'] = coalescer.metrics()
+    if prediction_cache is not None:
+        health['prediction_cache'] = prediction_cache.metrics()
+    if bundle is not None and CASCADE_BAND is not None:
+        health['cascade'] = bundle.describe()['cascade']
+    return jsonify(health)
 
 @app.route('/api/train', methods=['POST'])
 def train_model():
-    """Train the model endpoint"""
+    """Start a background training job endpoint"""
     try:
-        success = train_model_from_notebook()
+        options = request.get_json(silent=True)
+        if not isinstance(options, dict):
+            options = {}
         
-        if success:
-            return jsonify({
-                'status': 'success',
-                'message': 'Model trained and saved successfully'
-            })
-        else:
+        data_file = None
+        if options.get('incremental'):
+            data_file = options.get('data_file')
+            # Only plain file names inside TRAINING_DATA_DIR are accepted
+            if (not isinstance(data_file, str) or os.path.basename(data_file) != data_file
+                    or not os.path.isfile(os.path.join(TRAINING_DATA_DIR, data_file))):
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Incremental training needs "data_file": the name of a CSV in {TRAINING_DATA_DIR}/'
+                }), 400
+            if not os.path.exists(training.MODEL_PATH):
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Incremental training needs a trained model. Please train the model first.'
+                }), 400
+        
+        suite = None
+        if options.get('suite'):
+            suite = options.get('models') or list(training.SUITE_MODELS)
+            if not isinstance(suite, list) or any(name not in training.SUITE_MODELS for name in suite):
+                return jsonify({
+                    'status': 'error',
+                    'message': f'"models" must be a list of: {list(training.SUITE_MODELS)}'
+                }), 400
+        
+        model_type = options.get('model_type', 'random_forest')
+        if model_type not in training.MODEL_TYPES:
             return jsonify({
                 'status': 'error',
-                'message': 'Failed to train model'
-            }), 500
+                'message': f'Unknown model type: {model_type}. Use one of {list(training.MODEL_TYPES)}'
+            }), 400
+        
+        job, created = submit_training_job(
+            search=bool(options.get('search', False)), data_file=data_file, suite=suite,
+            model_type=model_type
+        )
+        
+        return jsonify({
+            'status': 'accepted' if created else 'already_running',
+            'message': 'Training job started' if created else 'A training job is already in progress',
+            'job_id': job['job_id'],
+            'status_url': f"/api/train/{job['job_id']}",
+            'job': job
+        }), 202
             
     except Exception as e:
         return jsonify({
@@ -148,12 +576,41 @@ def train_model():
             'message': f'Error training model: {str(e)}'
         }), 500
 
+@app.route('/api/reload', methods=['POST'])
+def reload_model_endpoint():
+    """Reload the model bundle from disk endpoint"""
+    if not reload_model():
+        return jsonify({
+            'status': 'error',
+            'message': 'Failed to load model. Please train the model first.'
+        }), 500
+    
+    return jsonify({
+        'status': 'success',
+        'model': current_bundle.describe()
+    })
+
+@app.route('/api/train/<job_id>', methods=['GET'])
+def train_status(job_id):
+    """Training job status endpoint"""
+    job = get_training_job(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown training job: {job_id}'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'job': job
+    })
+
 @app.route('/api/predict', methods=['POST'])
 def predict():
     """Predict credit card default endpoint"""
-    global model, scaler, feature_columns
+    bundle = current_bundle
     
-    if model is None or scaler is None:
+    if bundle is None:
         return jsonify({
             'status': 'error',
             'message': 'Model not loaded. Please train the model first.'
@@ -170,114 +627,208 @@ def predict():
                 'message': 'No data provided'
             }), 400
         
-        # Convert to DataFrame
-        input_data = pd.DataFrame([data])
+        feature_columns = bundle.feature_columns
         
         # Ensure all required features are present
-        missing_features = set(feature_columns) - set(input_data.columns)
+        present_features = set(data) if isinstance(data, dict) else set()
+        missing_features = set(feature_columns) - present_features
         if missing_features:
             return jsonify({
                 'status': 'error',
                 'message': f'Missing features: {list(missing_features)}'
             }), 400
         
-        # Reorder columns to match training data
-        input_data = input_data[feature_columns]
+        # Pack straight into a row ordered like the training data
+        input_data = pack_record(data, feature_columns)
         
-        # Scale the features
-        input_scaled = scaler.transform(input_data)
+        # Repeated snapshots of the same account are answered from the cache
+        cache_key = row_key(bundle.version, input_data) if prediction_cache is not None else None
+        cached = prediction_cache.get(cache_key) if cache_key is not None else None
         
-        # Make prediction
-        prediction = model.predict(input_scaled)[0]
-        probability = model.predict_proba(input_scaled)[0]
+        # Scale the features and make prediction (batched with concurrent
+        # requests when the coalescer is enabled)
+        if cached is not None:
+            prediction, probability, stage = cached
+        elif coalescer is not None:
+            prediction, probability, stage = coalescer.submit(input_data, bundle.predict_with_stages)
+        else:
+            predictions, probabilities, stages = bundle.predict_with_stages(input_data)
+            prediction = predictions[0]
+            probability = probabilities[0]
+            stage = stages[0] if stages is not None else None
         
-        # Get feature importance
-        feature_importance = dict(zip(feature_columns, model.feature_importances_))
+        if cache_key is not None and cached is None:
+            prediction_cache.put(cache_key, (prediction, probability, stage))
         
-        return jsonify({
+        response = {
             'status': 'success',
             'prediction': int(prediction),
             'probability': {
                 'no_default': float(probability[0]),
                 'default': float(probability[1])
             },
-            'feature_importance': feature_importance,
             'interpretation': {
                 'prediction_text': 'High risk of default' if prediction == 1 else 'Low risk of default',
                 'confidence': float(max(probability))
+            },
+            'model_version': bundle.version
+        }
+        
+        # Which cascade stage produced the answer, when cascade scoring is on
+        if stage is not None:
+            response['decided_by'] = str(stage)
+        
+        # Cached feature importance; ?include_importance=false leaves it out
+        if request.args.get('include_importance', 'true').lower() not in ('false', '0', 'no'):
+            response['feature_importance'] = bundle.feature_importance
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Prediction error: {str(e)}'
+        }), 500
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """List the models in the multi-model registry endpoint"""
+    registry = current_registry
+    if registry is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Model registry not loaded. Train it with POST /api/train {"suite": true}.'
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'registry': registry.describe()
+    })
+
+@app.route('/api/models/predict', methods=['POST'])
+def models_predict():
+    """Predict with several registry models or their ensemble endpoint
+
+    Body: one record or a list of records. Query parameters:
+    ?models=a,b (default: all), ?ensemble=average|weighted and
+    ?weights=a:2,b:1 (weighted ensembles; default: validation ROC AUC).
+    """
+    registry = current_registry
+    if registry is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Model registry not loaded. Train it with POST /api/train {"suite": true}.'
+        }), 400
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'status': 'error',
+                'message': 'No data provided'
+            }), 400
+        
+        records = data if isinstance(data, list) else [data]
+        feature_columns = registry.feature_columns
+        for i, record in enumerate(records):
+            present_features = set(record) if isinstance(record, dict) else set()
+            missing_features = set(feature_columns) - present_features
+            if missing_features:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Record {i}: Missing features: {list(missing_features)}'
+                }), 400
+        
+        names = request.args.get('models')
+        names = [name.strip() for name in names.split(',') if name.strip()] if names else None
+        ensemble = request.args.get('ensemble') or None
+        weights = request.args.get('weights')
+        if weights:
+            weights = {
+                name.strip(): float(weight)
+                for name, weight in (item.split(':', 1) for item in weights.split(',') if item.strip())
             }
-        })
         
+        input_data = np.vstack([pack_record(record, feature_columns) for record in records])
+        result = registry.predict(input_data, names=names, ensemble=ensemble, weights=weights or None)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
             'message': f'Prediction error: {str(e)}'
         }), 500
+    
+    def scored(probabilities):
+        return {
+            'predictions': probabilities.argmax(axis=1).tolist(),
+            'probabilities': [
+                {'no_default': row[0], 'default': row[1]} for row in probabilities.tolist()
+            ]
+        }
+    
+    response = {
+        'status': 'success',
+        'total_records': len(records),
+        'models': {
+            name: dict(scored(model_result['probabilities']), latency_ms=round(model_result['latency_ms'], 3))
+            for name, model_result in result['models'].items()
+        },
+        'preprocessing_ms': round(result['preprocessing_ms'], 3),
+        'total_ms': round(result['total_ms'], 3),
+        'registry_version': registry.version
+    }
+    if 'ensemble' in result:
+        response['ensemble'] = dict(
+            scored(result['ensemble']['probabilities']),
+            method=result['ensemble']['method'],
+            weights=result['ensemble']['weights']
+        )
+    
+    return jsonify(response)
 
 @app.route('/api/features', methods=['GET'])
 def get_features():
     """Get feature information endpoint"""
-    if feature_columns is None:
+    bundle = current_bundle
+    if bundle is None:
         return jsonify({
             'status': 'error',
             'message': 'Model not loaded'
         }), 400
     
-    # Feature descriptions based on the dataset
-    feature_descriptions = {
-        'LIMIT_BAL': 'Credit limit amount',
-        'SEX': 'Gender (1=male, 2=female)',
-        'EDUCATION': 'Education level (1=graduate school, 2=university, 3=high school, 4=others)',
-        'MARRIAGE': 'Marital status (1=married, 2=single, 3=others)',
-        'AGE': 'Age in years',
-        'PAY_0': 'Repayment status in September',
-        'PAY_2': 'Repayment status in August',
-        'PAY_3': 'Repayment status in July',
-        'PAY_4': 'Repayment status in June',
-        'PAY_5': 'Repayment status in May',
-        'PAY_6': 'Repayment status in April',
-        'BILL_AMT1': 'Bill statement amount in September',
-        'BILL_AMT2': 'Bill statement amount in August',
-        'BILL_AMT3': 'Bill statement amount in July',
-        'BILL_AMT4': 'Bill statement amount in June',
-        'BILL_AMT5': 'Bill statement amount in May',
-        'BILL_AMT6': 'Bill statement amount in April',
-        'PAY_AMT1': 'Previous payment amount in September',
-        'PAY_AMT2': 'Previous payment amount in August',
-        'PAY_AMT3': 'Previous payment amount in July',
-        'PAY_AMT4': 'Previous payment amount in June',
-        'PAY_AMT5': 'Previous payment amount in May',
-        'PAY_AMT6': 'Previous payment amount in April'
-    }
-    
-    features_info = []
-    for feature in feature_columns:
-        features_info.append({
-            'name': feature,
-            'description': feature_descriptions.get(feature, 'Feature description not available')
-        })
-    
     return jsonify({
         'status': 'success',
-        'features': features_info,
-        'total_features': len(feature_columns)
+        'features': list(bundle.features_info),
+        'total_features': len(bundle.feature_columns),
+        'model_version': bundle.version
     })
 
 @app.route('/api/batch_predict', methods=['POST'])
 def batch_predict():
     """Batch prediction endpoint for multiple records"""
-    global model, scaler, feature_columns
+    bundle = current_bundle
     
-    if model is None or scaler is None:
+    if bundle is None:
         return jsonify({
             'status': 'error',
             'message': 'Model not loaded. Please train the model first.'
         }), 400
     
     try:
+        # Binary bodies are answered in the same binary format
+        if request.mimetype in BINARY_MIMETYPES:
+            return binary_batch_predict(request.mimetype, bundle)
+        
         # Get data from request
         data = request.get_json()
         
+        if isinstance(data, dict) and 'columns' in data:
+            return columnar_batch_predict(data, bundle)
+        
         if 'records' not in data:
             return jsonify({
                 'status': 'error',
@@ -292,6 +843,8 @@ def batch_predict():
                 'message': 'Records must be a list'
             }), 400
         
+        feature_columns = list(bundle.feature_columns)
+        
         # Convert to DataFrame
         input_data = pd.DataFrame(records)
         
@@ -306,30 +859,14 @@ def batch_predict():
         # Reorder columns
         input_data = input_data[feature_columns]
         
-        # Scale features
-        input_scaled = scaler.transform(input_data)
-        
-        # Make predictions
-        predictions = model.predict(input_scaled)
-        probabilities = model.predict_proba(input_scaled)
-        
-        # Format results
-        results = []
-        for i, (pred, prob) in enumerate(zip(predictions, probabilities)):
-            results.append({
-                'record_id': i,
-                'prediction': int(pred),
-                'probability': {
-                    'no_default': float(prob[0]),
-                    'default': float(prob[1])
-                },
-                'confidence': float(max(prob))
-            })
+        # Scale features and make predictions
+        predictions, probabilities, stages = bundle.predict_with_stages(input_data)
         
-        return jsonify({
+        return json_response({
             'status': 'success',
-            'predictions': results,
-            'total_records': len(results)
+            'predictions': batch_results(predictions, probabilities, stages),
+            'total_records': len(predictions),
+            'model_version': bundle.version
         })
         
     except Exception as e:
@@ -338,6 +875,321 @@ def batch_predict():
             'message': f'Batch prediction error: {str(e)}'
         }), 500
 
+def json_response(payload, status=200):
+    """Encode a large JSON response, with orjson when it is installed
+
+    Produces the same document as jsonify (key order aside) without
+    Flask's pretty-printing and type checks.
+    """
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
+
+def batch_results(predictions, probabilities, stages=None):
+    """Per-record /api/batch_predict results, built from whole columns
+
+    Every column is converted to Python numbers in one .tolist() call
+    instead of casting each value with int()/float().
+    """
+    columns = [
+        np.asarray(predictions).astype(np.int64).tolist(),
+        probabilities[:, 0].tolist(),
+        probabilities[:, 1].tolist(),
+        probabilities.max(axis=1).tolist()
+    ]
+    results = [
+        {
+            'record_id': i,
+            'prediction': pred,
+            'probability': {
+                'no_default': no_default,
+                'default': default
+            },
+            'confidence': confidence
+        }
+        for i, (pred, no_default, default, confidence) in enumerate(zip(*columns))
+    ]
+    if stages is not None:
+        for result, stage in zip(results, stages.tolist()):
+            result['decided_by'] = stage
+    return results
+
+# Result fields returned by columnar batch predictions
+BATCH_RESULT_COLUMNS = ['record_id', 'prediction', 'no_default', 'default', 'confidence']
+
+def columnar_to_matrix(data, columns):
+    """Build a float64 feature matrix in `columns` order from a columnar body
+
+    Accepts either {"columns": [...], "values": [[...], ...]} (row-major) or
+    {"columns": {"FEATURE": [...], ...}} (one array per feature).
+    Returns (matrix, error_message).
+    """
+    body_columns = data['columns']
+    
+    if isinstance(body_columns, dict):
+        missing_features = set(columns) - set(body_columns)
+        if missing_features:
+            return None, f'Missing features: {list(missing_features)}'
+        lengths = {len(body_columns[name]) if isinstance(body_columns[name], list) else None for name in columns}
+        if None in lengths or len(lengths) != 1:
+            return None, 'All feature arrays must be lists of the same length'
+        matrix = np.empty((lengths.pop(), len(columns)), dtype=np.float64)
+        for j, name in enumerate(columns):
+            matrix[:, j] = body_columns[name]
+        return matrix, None
+    
+    if not isinstance(body_columns, list) or 'values' not in data:
+        return None, 'Expected format: {"columns": [...], "values": [[...], ...]} or {"columns": {"FEATURE": [...]}}'
+    
+    missing_features = set(columns) - set(body_columns)
+    if missing_features:
+        return None, f'Missing features: {list(missing_features)}'
+    
+    values = np.asarray(data['values'], dtype=np.float64)
+    if values.size == 0:
+        values = values.reshape(0, len(body_columns))
+    if values.ndim != 2 or values.shape[1] != len(body_columns):
+        return None, f'Values must be a list of rows with {len(body_columns)} entries each'
+    
+    # Reorder only when the body's column order differs from the training order
+    if body_columns != list(columns):
+        positions = {name: i for i, name in enumerate(body_columns)}
+        values = values[:, [positions[name] for name in columns]]
+    return values, None
+
+def columnar_batch_predict(data, bundle):
+    """Score a columnar batch body and answer in the same columnar shape"""
+    input_data, error = columnar_to_matrix(data, bundle.feature_columns)
+    if error:
+        return jsonify({
+            'status': 'error',
+            'message': error
+        }), 400
+    
+    predictions, probabilities, stages = bundle.predict_with_stages(input_data)
+    
+    result_names = list(BATCH_RESULT_COLUMNS)
+    result_columns = [
+        list(range(len(predictions))),
+        predictions.astype(int).tolist(),
+        probabilities[:, 0].tolist(),
+        probabilities[:, 1].tolist(),
+        probabilities.max(axis=1).tolist()
+    ]
+    if stages is not None:
+        result_names.append('decided_by')
+        result_columns.append(stages.tolist())
+    
+    if isinstance(data['columns'], dict):
+        results = dict(zip(result_names, result_columns))
+    else:
+        results = {
+            'columns': result_names,
+            'values': [list(row) for row in zip(*result_columns)]
+        }
+    
+    return json_response({
+        'status': 'success',
+        'predictions': results,
+        'total_records': len(predictions),
+        'model_version': bundle.version
+    })
+
+# Binary batch formats (request body and response use the same one)
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+NPY_MIMETYPE = 'application/x-npy'
+BINARY_MIMETYPES = (ARROW_STREAM_MIMETYPE, NPY_MIMETYPE)
+
+# Structured dtype of NPY batch responses
+NPY_RESULT_DTYPE = np.dtype([('prediction', '<i8'), ('no_default', '<f8'), ('default', '<f8')])
+
+def read_npy_body(body, columns):
+    """View a .npy body as a feature matrix without copying; returns (matrix, error)"""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        return None, f'Invalid NPY body: {e}'
+    
+    if dtype.hasobject or dtype.kind not in 'iuf':
+        return None, 'NPY body must hold a numeric array'
+    if len(shape) != 2 or shape[1] != len(columns):
+        return None, f'NPY body must have shape (n_records, {len(columns)}) in feature_columns order'
+    
+    count = shape[0] * shape[1]
+    if len(body) - stream.tell() < count * dtype.itemsize:
+        return None, f'Invalid NPY body: expected {count * dtype.itemsize} bytes of data after the header'
+    matrix = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    matrix = matrix.reshape(shape, order='F' if fortran_order else 'C')
+    return matrix.astype(np.float64, copy=False), None
+
+def read_arrow_body(body, columns):
+    """Read an Arrow IPC stream body into a feature matrix; returns (matrix, error)"""
+    if pa is None:
+        return None, 'Arrow bodies require pyarrow to be installed'
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        return None, f'Invalid Arrow stream: {e}'
+    
+    missing_features = set(columns) - set(table.column_names)
+    if missing_features:
+        return None, f'Missing features: {list(missing_features)}'
+    
+    matrix = np.empty((table.num_rows, len(columns)), dtype=np.float64)
+    for j, name in enumerate(columns):
+        matrix[:, j] = table.column(name).to_numpy()
+    return matrix, None
+
+def write_npy_predictions(predictions, probabilities):
+    """Encode batch results as a structured .npy array"""
+    results = np.empty(len(predictions), dtype=NPY_RESULT_DTYPE)
+    results['prediction'] = predictions
+    results['no_default'] = probabilities[:, 0]
+    results['default'] = probabilities[:, 1]
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, results, allow_pickle=False)
+    return buffer.getvalue()
+
+def write_arrow_predictions(predictions, probabilities):
+    """Encode batch results as an Arrow IPC stream"""
+    batch = pa.record_batch([
+        pa.array(predictions.astype(np.int64)),
+        pa.array(probabilities[:, 0]),
+        pa.array(probabilities[:, 1])
+    ], names=['prediction', 'no_default', 'default'])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+def binary_batch_predict(mimetype, bundle):
+    """Score an Arrow IPC / NPY batch body and answer in the same format"""
+    body = request.get_data()
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        input_data, error = read_arrow_body(body, bundle.feature_columns)
+    else:
+        input_data, error = read_npy_body(body, bundle.feature_columns)
+    
+    if error:
+        return jsonify({
+            'status': 'error',
+            'message': error
+        }), 400
+    
+    predictions, probabilities = bundle.predict_with_probabilities(input_data)
+    
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        payload = write_arrow_predictions(predictions, probabilities)
+    else:
+        payload = write_npy_predictions(predictions, probabilities)
+    return Response(payload, mimetype=mimetype, headers={
+        'X-Total-Records': str(len(predictions)),
+        'X-Model-Version': bundle.version
+    })
+
+# Records scored per chunk by /api/stream_predict
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '1024'))
+
+def ndjson_results(record_ids, matrix, bundle):
+    """Score packed rows and return (record_id, result) pairs"""
+    predictions, probabilities, stages = bundle.predict_with_stages(matrix)
+    results = []
+    for i, (record_id, pred, prob) in enumerate(zip(record_ids, predictions.tolist(), probabilities.tolist())):
+        results.append((record_id, {
+            'record_id': record_id,
+            'prediction': int(pred),
+            'probability': {
+                'no_default': prob[0],
+                'default': prob[1]
+            },
+            'confidence': max(prob),
+            'model_version': bundle.version
+        }))
+        if stages is not None:
+            results[-1][1]['decided_by'] = str(stages[i])
+    return results
+
+def score_ndjson_chunk(lines, first_record_id, matrix, bundle):
+    """Score a chunk of NDJSON lines and return the NDJSON result lines
+
+    `matrix` is a preallocated (STREAM_CHUNK_SIZE, n_features) buffer reused
+    across chunks so memory stays bounded for arbitrarily long streams.
+    """
+    output = []
+    scored_ids = []
+    for offset, line in enumerate(lines):
+        record_id = first_record_id + offset
+        try:
+            data = json.loads(line)
+            present_features = set(data) if isinstance(data, dict) else set()
+            missing_features = set(bundle.feature_columns) - present_features
+            if missing_features:
+                raise ValueError(f'Missing features: {list(missing_features)}')
+            matrix[len(scored_ids)] = pack_record(data, bundle.feature_columns)[0]
+            scored_ids.append(record_id)
+        except Exception as e:
+            output.append((record_id, {
+                'record_id': record_id,
+                'status': 'error',
+                'message': str(e)
+            }))
+    
+    if scored_ids:
+        try:
+            output.extend(ndjson_results(scored_ids, matrix[:len(scored_ids)], bundle))
+        except Exception:
+            # The headers are already sent, so a chunk must never abort the
+            # stream: find the bad rows by scoring one row at a time
+            for i, record_id in enumerate(scored_ids):
+                try:
+                    output.extend(ndjson_results([record_id], matrix[i:i + 1], bundle))
+                except Exception as e:
+                    output.append((record_id, {
+                        'record_id': record_id,
+                        'status': 'error',
+                        'message': str(e)
+                    }))
+    
+    output.sort(key=lambda item: item[0])
+    return ''.join(json.dumps(result) + '\n' for _, result in output)
+
+@app.route('/api/stream_predict', methods=['POST'])
+def stream_predict():
+    """Streaming prediction endpoint: NDJSON records in, NDJSON results out"""
+    # The whole stream is scored by the bundle that was current when it began
+    bundle = current_bundle
+    
+    if bundle is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Model not loaded. Please train the model first.'
+        }), 400
+    
+    def generate():
+        matrix = np.empty((STREAM_CHUNK_SIZE, len(bundle.feature_columns)), dtype=np.float64)
+        chunk = []
+        record_id = 0
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            chunk.append(line)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield score_ndjson_chunk(chunk, record_id, matrix, bundle)
+                record_id += len(chunk)
+                chunk = []
+        if chunk:
+            yield score_ndjson_chunk(chunk, record_id, matrix, bundle)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # if __name__ == '__main__':
 #     # Try to load existing model on startup
 #     load_model()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark: /api/batch_predict response serialization
+
+Compares turning model output (prediction and probability arrays) into
+the JSON response body with:
+
+- the original loop: one dict per row with int()/float() casts + jsonify
+- batch_results() + json_response() with the stdlib json encoder
+- batch_results() + json_response() with orjson (if installed)
+
+and checks that every path produces the same document.
+
+Usage: python benchmarks/bench_batch_serialization.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as api
+from flask import jsonify
+
+
+def loop_response(predictions, probabilities):
+    """The per-row loop batch_predict used before batch_results()"""
+    results = []
+    for i, (pred, prob) in enumerate(zip(predictions, probabilities)):
+        results.append({
+            'record_id': i,
+            'prediction': int(pred),
+            'probability': {
+                'no_default': float(prob[0]),
+                'default': float(prob[1])
+            },
+            'confidence': float(max(prob))
+        })
+    return jsonify({
+        'status': 'success',
+        'predictions': results,
+        'total_records': len(results),
+        'model_version': 'benchmark'
+    })
+
+
+def vectorized_response(predictions, probabilities):
+    return api.json_response({
+        'status': 'success',
+        'predictions': api.batch_results(predictions, probabilities),
+        'total_records': len(predictions),
+        'model_version': 'benchmark'
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch response serialization benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    orjson = api.orjson
+    paths = [('loop + jsonify', loop_response), ('columns + json', None)]
+    if orjson is not None:
+        paths.append(('columns + orjson', None))
+    else:
+        print("orjson is not installed (pip install orjson); skipping that path")
+
+    rng = np.random.default_rng(0)
+    with api.app.app_context():
+        print(f"{'rows':>8}  " + "  ".join(f"{name:>18}" for name, _ in paths) + "  speedup")
+        for size in args.sizes:
+            positive = rng.random(size)
+            probabilities = np.column_stack((1 - positive, positive))
+            predictions = (positive > 0.5).astype(np.int64)
+
+            times = []
+            bodies = []
+            for name, func in paths:
+                # json_response picks its encoder from the module global
+                api.orjson = orjson if name.endswith('orjson') else None
+                func = func or vectorized_response
+                bodies.append(json.loads(func(predictions, probabilities).get_data()))
+                number = max(1, 200000 // size)
+                times.append(min(timeit.repeat(lambda: func(predictions, probabilities).get_data(),
+                                               number=number, repeat=3)) / number * 1000.0)
+            api.orjson = orjson
+
+            assert all(body == bodies[0] for body in bodies), 'Responses differ'
+            print(f"{size:>8}  " + "  ".join(f"{t:>15.2f} ms" for t in times)
+                  + f"  {times[0] / times[-1]:>6.1f}x")
+
+    print("\nTimes are per response (lower is better); speedup is loop vs the last path.")
+
+
+if __name__ == "__main__":
+    main()
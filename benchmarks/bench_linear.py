@@ -0,0 +1,54 @@
+"""
+Microbenchmark: folded logistic regression vs sklearn, one record
+
+Trains the notebook's LogisticRegression and times scoring a single
+record through scaler.transform + predict_proba and through the folded
+LinearEngine (one dot product on raw features).
+
+Usage: python benchmarks/bench_linear.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+import warnings
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linear_engine import LinearEngine
+from training import DATASET_PATH, fit_model_bundle, load_training_split
+
+# The sklearn path gets a plain array, like the API does after pack_record
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    model_data, _ = fit_model_bundle(DATASET_PATH, model_type='logistic_regression')
+    model, scaler = model_data['model'], model_data['scaler']
+    engine = LinearEngine.from_sklearn(model, scaler)
+
+    _, X_test, _, _ = load_training_split(DATASET_PATH)
+    X = X_test.to_numpy(dtype=np.float64)
+    difference = np.abs(engine.predict_proba(X) - model.predict_proba(scaler.transform(X))).max()
+    row = X[:1]
+
+    print(f"Single-record scoring ({iterations} iterations)")
+    results = {}
+    for name, func in [('sklearn', lambda: model.predict_proba(scaler.transform(row))),
+                       ('Folded linear', lambda: engine.predict_with_proba(row))]:
+        number = iterations if name != 'sklearn' else max(1, iterations // 20)
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        results[name] = best / number * 1e6
+        print(f"{name:<16} {results[name]:10.2f} us/record")
+
+    print(f"Speedup: {results['sklearn'] / results['Folded linear']:.1f}x")
+    print(f"Max probability difference on the test split: {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Microbenchmark: /api/predict request parsing
+
+Compares the original pandas path (DataFrame -> set difference -> reindex)
+with the pack_record fast path that fills a float64 row directly.
+
+Usage: python benchmarks/bench_request_parsing.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+import pandas as pd
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import pack_record
+
+FEATURE_COLUMNS = [
+    'LIMIT_BAL', 'SEX', 'EDUCATION', 'MARRIAGE', 'AGE',
+    'PAY_0', 'PAY_2', 'PAY_3', 'PAY_4', 'PAY_5', 'PAY_6',
+    'BILL_AMT1', 'BILL_AMT2', 'BILL_AMT3', 'BILL_AMT4', 'BILL_AMT5', 'BILL_AMT6',
+    'PAY_AMT1', 'PAY_AMT2', 'PAY_AMT3', 'PAY_AMT4', 'PAY_AMT5', 'PAY_AMT6'
+]
+
+SAMPLE_RECORD = {name: 1000 for name in FEATURE_COLUMNS}
+SAMPLE_RECORD.update({'LIMIT_BAL': 20000, 'SEX': 1, 'EDUCATION': 1, 'MARRIAGE': 1, 'AGE': 30})
+
+
+def dataframe_path(data):
+    """Original request parsing from predict()"""
+    input_data = pd.DataFrame([data])
+    missing_features = set(FEATURE_COLUMNS) - set(input_data.columns)
+    if missing_features:
+        raise ValueError(f'Missing features: {list(missing_features)}')
+    return input_data[FEATURE_COLUMNS].to_numpy(dtype='float64')
+
+
+def fast_path(data):
+    """pack_record fast path used by predict()"""
+    missing_features = set(FEATURE_COLUMNS) - set(data)
+    if missing_features:
+        raise ValueError(f'Missing features: {list(missing_features)}')
+    return pack_record(data, FEATURE_COLUMNS)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    assert (dataframe_path(SAMPLE_RECORD) == fast_path(SAMPLE_RECORD)).all()
+
+    print(f"Request parsing benchmark ({iterations} iterations, {len(FEATURE_COLUMNS)} features)")
+    results = {}
+    for name, func in [('DataFrame path', dataframe_path), ('Fast path', fast_path)]:
+        best = min(timeit.repeat(lambda: func(SAMPLE_RECORD), number=iterations, repeat=5))
+        results[name] = best / iterations * 1e6
+        print(f"{name:<16} {results[name]:10.2f} us/record")
+
+    print(f"Speedup: {results['DataFrame path'] / results['Fast path']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
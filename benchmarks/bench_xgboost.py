@@ -0,0 +1,85 @@
+"""
+Benchmark: XGBoost booster backend vs the RandomForest paths
+
+Trains the notebook's RandomForest and XGBClassifier on the dataset, then
+times scoring of /api/batch_predict-sized inputs through:
+
+- RandomForest via sklearn (scaler.transform + predict_proba)
+- RandomForest via the fused array engine
+- XGBoost via the sklearn wrapper (scaler.transform + predict_proba)
+- XGBoost via Booster.inplace_predict, for each --nthread value
+
+Usage: python benchmarks/bench_xgboost.py [--sizes 1 100 1000 10000] [--nthread 1 0]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest_engine import CompiledForest
+from training import DATASET_PATH, fit_model_bundle, load_training_split
+from xgboost_engine import XGBoostEngine, xgboost
+
+# The sklearn paths get plain arrays, like the API does after pack_record
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+
+def best_time(func, min_seconds=0.2):
+    """Best per-call time in milliseconds, over enough calls to be stable"""
+    number = 1
+    while timeit.timeit(func, number=number) < min_seconds and number < 100000:
+        number *= 2
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XGBoost serving backend benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 1000, 10000])
+    parser.add_argument('--nthread', type=int, nargs='+', default=[1, 0],
+                        help='Booster thread counts to try (0 = all cores)')
+    args = parser.parse_args()
+
+    if xgboost is None:
+        print("xgboost is not installed (pip install xgboost)")
+        return
+
+    print("Training models...")
+    rf_data, _ = fit_model_bundle(DATASET_PATH)
+    xgb_data, _ = fit_model_bundle(DATASET_PATH, model_type='xgboost')
+    fused = CompiledForest.from_sklearn(rf_data['model'], rf_data['scaler']).fuse_scaler()
+    engines = {n: XGBoostEngine.from_sklearn(xgb_data['model'], xgb_data['scaler'], nthread=n) for n in args.nthread}
+
+    _, X_test, _, _ = load_training_split(DATASET_PATH)
+    pool = X_test.to_numpy(dtype=np.float64)
+
+    # Same answers from the booster path and the sklearn wrapper
+    check = pool[:1000]
+    expected = xgb_data['model'].predict_proba(xgb_data['scaler'].transform(check))
+    for engine in engines.values():
+        assert np.array_equal(engine.predict_proba(check), expected)
+
+    paths = [
+        ('RF sklearn', lambda X: rf_data['model'].predict_proba(rf_data['scaler'].transform(X))),
+        ('RF fused engine', fused.predict_proba),
+        ('XGB sklearn wrapper', lambda X: xgb_data['model'].predict_proba(xgb_data['scaler'].transform(X))),
+    ]
+    for n, engine in engines.items():
+        paths.append((f"XGB booster (nthread={n or 'auto'})", engine.predict_proba))
+
+    print(f"\n{'rows':>7}  " + "  ".join(f"{name:>26}" for name, _ in paths))
+    for size in args.sizes:
+        X = np.resize(pool, (size, pool.shape[1]))
+        times = [best_time(lambda func=func: func(X)) for _, func in paths]
+        print(f"{size:>7}  " + "  ".join(f"{t:>23.3f} ms" for t in times))
+    print("\nTimes are per call (lower is better).")
+
+
+if __name__ == "__main__":
+    main()
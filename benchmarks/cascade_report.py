@@ -0,0 +1,101 @@
+"""
+Report: cascade scoring throughput vs agreement with the full forest
+
+Trains the RandomForest (with its linear cascade screen) on the dataset and
+scores the held-out split with the fused forest alone and with cascades
+over several uncertainty bands. For each band it prints the share of rows
+the forest still had to score, the agreement rate with full-forest
+predictions, accuracy, and throughput for whole-batch and single-record
+scoring.
+
+Usage: python benchmarks/cascade_report.py [--bands 0.2,0.5 0.1,0.6] [--screen linear trees]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cascade import CASCADE_SCREEN_TREES, CascadeEngine, parse_band, tree_subset
+from forest_engine import CompiledForest
+from linear_engine import LinearEngine
+from training import DATASET_PATH, fit_model_bundle, load_training_split
+
+DEFAULT_BANDS = ['0.3,0.5', '0.2,0.6', '0.15,0.7', '0.1,0.8', '0.05,0.9']
+
+
+def rows_per_second(func, X, min_seconds=0.5):
+    """Best throughput of func(X) over a few timed runs"""
+    best = float('inf')
+    spent = 0.0
+    while spent < min_seconds:
+        started = time.perf_counter()
+        func(X)
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+    return len(X) / best
+
+
+def single_record_us(func, X, records=2000):
+    """Mean microseconds per call scoring one record at a time"""
+    rows = [X[i:i + 1] for i in range(min(records, len(X)))]
+    started = time.perf_counter()
+    for row in rows:
+        func(row)
+    return (time.perf_counter() - started) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascade scoring report")
+    parser.add_argument('--bands', nargs='+', default=DEFAULT_BANDS,
+                        help='Uncertainty bands as low,high')
+    parser.add_argument('--screen', nargs='+', default=['linear', 'trees'], choices=['linear', 'trees'],
+                        help=f'Screening models (trees = first {CASCADE_SCREEN_TREES} trees)')
+    args = parser.parse_args()
+
+    print("Training model...")
+    model_data, _ = fit_model_bundle(DATASET_PATH)
+    forest = CompiledForest.from_sklearn(model_data['model'], model_data['scaler']).fuse_scaler()
+    screens = {
+        'linear': LinearEngine.from_sklearn(model_data['screen_model'], model_data['scaler']),
+        'trees': tree_subset(forest, CASCADE_SCREEN_TREES)
+    }
+
+    _, X_test, _, y_test = load_training_split(DATASET_PATH)
+    X = X_test.to_numpy(dtype=np.float64)
+    y = y_test.to_numpy()
+    expected = forest.predict(X)
+
+    base_batch = rows_per_second(forest.predict_with_proba, X)
+    base_single = single_record_us(forest.predict_with_proba, X)
+    print(f"\nFull forest: {base_batch:,.0f} rows/s batched, {base_single:.1f} us/record, "
+          f"accuracy {np.mean(expected == y):.4f} ({len(X):,} test rows)")
+
+    header = (f"{'screen':>8} {'band':>11} {'to forest':>10} {'agreement':>10} {'accuracy':>9} "
+              f"{'rows/s':>12} {'speedup':>8} {'us/record':>10} {'speedup':>8}")
+    for screen_name in args.screen:
+        print(f"\n{header}")
+        for band in args.bands:
+            low, high = parse_band(band)
+            cascade = CascadeEngine(screens[screen_name], forest, low, high)
+            predictions, _, stages = cascade.predict_with_stages(X)
+            forwarded = np.mean(stages == 'forest')
+            agreement = np.mean(predictions == expected)
+            accuracy = np.mean(predictions == y)
+            batch = rows_per_second(cascade.predict_with_proba, X)
+            single = single_record_us(cascade.predict_with_proba, X)
+            print(f"{screen_name:>8} {low:>5.2f}-{high:<5.2f} {forwarded:>10.1%} {agreement:>10.2%} "
+                  f"{accuracy:>9.4f} {batch:>12,.0f} {batch / base_batch:>7.1f}x "
+                  f"{single:>10.1f} {base_single / single:>7.1f}x")
+
+    print("\nAgreement is with full-forest predictions; speedups are against the full forest.")
+
+
+if __name__ == "__main__":
+    main()
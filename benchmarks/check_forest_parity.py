@@ -0,0 +1,86 @@
+"""
+Parity check: compiled forest engines vs sklearn
+
+Scores the held-out split, plus copies of it with missing (NaN) features,
+through sklearn (scaler.transform + predict_proba) and through the
+compiled, fused and memory-mapped artifact engines, and checks that every
+engine returns identical probabilities.
+
+Uses credit_card_model.pkl when it exists, otherwise trains the model.
+
+Usage: python benchmarks/check_forest_parity.py [--missing-rate 0.1]
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest_engine import CompiledForest
+from model_artifact import load_artifact, save_artifact
+from training import DATASET_PATH, MODEL_PATH, fit_model_bundle, load_training_split
+
+# The sklearn path gets plain arrays, like the API does after pack_record
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled forest parity check")
+    parser.add_argument('--missing-rate', type=float, default=0.1,
+                        help='Share of feature values replaced by NaN in the missing-value check')
+    args = parser.parse_args()
+
+    if os.path.exists(MODEL_PATH):
+        with open(MODEL_PATH, 'rb') as f:
+            model_data = pickle.load(f)
+    else:
+        print("Training model...")
+        model_data, _ = fit_model_bundle(DATASET_PATH)
+    model, scaler = model_data['model'], model_data['scaler']
+
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    engines = {'compiled': compiled, 'fused': compiled.fuse_scaler()}
+    fd, artifact_path = tempfile.mkstemp(suffix='.forest')
+    os.close(fd)
+    try:
+        save_artifact(artifact_path, model_data)
+        engines['artifact (compiled)'] = load_artifact(artifact_path, fused=False)[0]
+        engines['artifact (fused)'] = load_artifact(artifact_path, fused=True)[0]
+
+        _, X_test, _, _ = load_training_split(DATASET_PATH)
+        X = X_test.to_numpy(dtype=np.float64)
+        rng = np.random.default_rng(0)
+        missing = X.copy()
+        missing[rng.random(X.shape) < args.missing_rate] = np.nan
+        # One row per feature with only that feature missing, and one with all missing
+        single = np.repeat(X[:1], X.shape[1] + 1, axis=0)
+        single[np.arange(X.shape[1]), np.arange(X.shape[1])] = np.nan
+        single[-1] = np.nan
+
+        if compiled.missing_left is None:
+            print("This sklearn version cannot score missing values; checking finite rows only")
+            inputs = {'finite rows': X}
+        else:
+            inputs = {'finite rows': X, f'{args.missing_rate:.0%} NaN': missing, 'single NaN': single}
+
+        for label, rows in inputs.items():
+            expected = model.predict_proba(scaler.transform(rows))
+            for name, engine in engines.items():
+                identical = np.array_equal(engine.predict_proba(rows), expected)
+                print(f"{label:>12}  {name:<20} {'identical' if identical else 'MISMATCH'} ({len(rows):,} rows)")
+                assert identical, f'{name} differs from sklearn on {label}'
+    finally:
+        os.remove(artifact_path)
+
+    print("\nAll engines match sklearn.")
+
+
+if __name__ == "__main__":
+    main()
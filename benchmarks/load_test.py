@@ -0,0 +1,108 @@
+"""
+Load test for /api/predict
+
+Runs concurrent client processes (each with a keep-alive session) against
+a running API and reports throughput and latency percentiles. Each request
+sends a different account from the dataset, so the prediction cache does
+not answer them; --repeat-record sends SAMPLE_RECORD every time to measure
+cached responses instead. Use it to compare launchers, e.g.:
+
+    python start_flask.py                          # terminal 1
+    python benchmarks/load_test.py --concurrency 16
+
+    python start_flask.py --prefork                # terminal 1
+    python benchmarks/load_test.py --concurrency 16
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'UCI_Credit_Card.csv')
+
+SAMPLE_RECORD = {
+    'LIMIT_BAL': 20000, 'SEX': 1, 'EDUCATION': 1, 'MARRIAGE': 1, 'AGE': 30,
+    'PAY_0': 0, 'PAY_2': 0, 'PAY_3': 0, 'PAY_4': 0, 'PAY_5': 0, 'PAY_6': 0,
+    'BILL_AMT1': 1000, 'BILL_AMT2': 1000, 'BILL_AMT3': 1000,
+    'BILL_AMT4': 1000, 'BILL_AMT5': 1000, 'BILL_AMT6': 1000,
+    'PAY_AMT1': 1000, 'PAY_AMT2': 1000, 'PAY_AMT3': 1000,
+    'PAY_AMT4': 1000, 'PAY_AMT5': 1000, 'PAY_AMT6': 1000
+}
+
+
+# Records sent by the client processes (set by init_client)
+_records = None
+
+
+def load_records(path):
+    """Feature records of every account in the dataset"""
+    data = pd.read_csv(path, usecols=list(SAMPLE_RECORD))
+    return data.to_dict('records')
+
+
+def init_client(records):
+    global _records
+    _records = records
+
+
+def client(args):
+    """One client process: send requests until the deadline, return latencies"""
+    url, deadline, start = args
+    session = requests.Session()
+    latencies = []
+    errors = 0
+    sent = 0
+    while time.time() < deadline:
+        record = _records[(start + sent) % len(_records)]
+        sent += 1
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json=record, timeout=30)
+            if response.status_code != 200:
+                errors += 1
+                continue
+        except requests.RequestException:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction API")
+    parser.add_argument('--url', default='http://localhost:5000/api/predict?include_importance=false')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--data', default=DATASET_PATH, help='CSV whose accounts are sent as requests')
+    parser.add_argument('--repeat-record', action='store_true',
+                        help='Send SAMPLE_RECORD every time (measures cached responses)')
+    args = parser.parse_args()
+
+    records = [SAMPLE_RECORD] if args.repeat_record else load_records(args.data)
+    print(f"Load testing {args.url} with {args.concurrency} clients for {args.duration:.0f}s "
+          f"({len(records):,} distinct records)...")
+    deadline = time.time() + args.duration
+    # Clients start at evenly spaced records so they do not send the same ones
+    starts = [i * len(records) // args.concurrency for i in range(args.concurrency)]
+    with multiprocessing.Pool(args.concurrency, initializer=init_client, initargs=(records,)) as pool:
+        results = pool.map(client, [(args.url, deadline, start) for start in starts])
+
+    latencies = np.array([latency for result, _ in results for latency in result]) * 1000.0
+    errors = sum(errors for _, errors in results)
+    if len(latencies) == 0:
+        print(f"No successful requests ({errors} errors). Is the API running with a model loaded?")
+        return
+
+    print(f"Requests:    {len(latencies)} ok, {errors} errors")
+    print(f"Throughput:  {len(latencies) / args.duration:.1f} req/s")
+    print(f"Latency ms:  p50 {np.percentile(latencies, 50):.2f}  "
+          f"p95 {np.percentile(latencies, 95):.2f}  p99 {np.percentile(latencies, 99):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Two-stage cascade scoring
+
+A cheap screening model scores every row first. Only rows whose screening
+probability of default falls inside an uncertainty band [low, high] are
+passed on to the full forest; all other rows take the screen's answer.
+Most accounts are clearly low risk, so most requests never touch the
+forest.
+
+The screen is the linear model trained alongside the forest (see
+training.fit_model_bundle) or, for bundles without one, the forest's
+first CASCADE_SCREEN_TREES trees.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from forest_engine import CompiledForest
+
+# Trees used as the screen when the bundle has no linear screening model
+CASCADE_SCREEN_TREES = int(os.getenv('CASCADE_SCREEN_TREES', '10'))
+
+SCREEN_STAGE = 'screen'
+FOREST_STAGE = 'forest'
+
+
+def parse_band(value):
+    """Parse a 'low,high' uncertainty band; returns (low, high) or None when empty"""
+    if value is None or not str(value).strip():
+        return None
+    try:
+        low, high = (float(part) for part in str(value).split(','))
+    except ValueError:
+        raise ValueError(f'Cascade band must be "low,high", got {value!r}')
+    if not 0.0 <= low <= high <= 1.0:
+        raise ValueError(f'Cascade band must satisfy 0 <= low <= high <= 1, got {value!r}')
+    return low, high
+
+
+def tree_subset(forest, n_trees):
+    """A forest scoring with only the first `n_trees` trees (shares the node arrays)"""
+    return CompiledForest(
+        feature=forest.feature,
+        threshold=forest.threshold,
+        children=forest.children,
+        value=forest.value,
+        roots=forest.roots[:n_trees],
+        max_depth=forest.max_depth,
+        classes=forest.classes,
+        scaler_mean=forest.scaler_mean,
+        scaler_scale=forest.scaler_scale,
+        fused=forest.fused,
+        missing_left=forest.missing_left,
+    )
+
+
+class CascadeEngine:
+    """Screen every row, score only the uncertain ones with the full forest"""
+
+    name = 'cascade'
+
+    def __init__(self, screen, full, low, high):
+        if not np.array_equal(np.asarray(screen.classes), np.asarray(full.classes)):
+            raise ValueError('Screen and forest must predict the same classes')
+        self.screen = screen
+        self.full = full
+        self.low = float(low)
+        self.high = float(high)
+        self.classes = full.classes
+        self.fused = full.fused
+        self._lock = threading.Lock()
+        self._rows = 0
+        self._forest_rows = 0
+
+    @property
+    def screen_name(self):
+        if isinstance(self.screen, CompiledForest):
+            return f'{self.screen.n_trees} trees'
+        return getattr(self.screen, 'name', type(self.screen).__name__)
+
+    def predict_with_stages(self, X):
+        """Return (predictions, probabilities, stages)
+
+        `stages[i]` is 'screen' or 'forest', the stage whose probabilities
+        row i got. Rows with missing (NaN) features always go to the forest.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if np.isinf(X).any():
+            raise ValueError("Input contains NaN or infinity")
+
+        # The screen cannot judge rows with missing values (the linear model
+        # rejects NaN), so the forest always decides them
+        missing = np.isnan(X).any(axis=1)
+        if missing.any():
+            probabilities = np.empty((len(X), len(self.classes)))
+            uncertain = missing.copy()
+            screened = ~missing
+            if screened.any():
+                probabilities[screened] = self.screen.predict_proba(X[screened])
+                positive = probabilities[screened, 1]
+                uncertain[screened] = (positive >= self.low) & (positive <= self.high)
+        else:
+            probabilities = self.screen.predict_proba(X)
+            positive = probabilities[:, 1]
+            uncertain = (positive >= self.low) & (positive <= self.high)
+        forwarded = int(np.count_nonzero(uncertain))
+        if forwarded == len(X):
+            probabilities = self.full.predict_proba(X)
+        elif forwarded:
+            probabilities[uncertain] = self.full.predict_proba(X[uncertain])
+
+        with self._lock:
+            self._rows += len(X)
+            self._forest_rows += forwarded
+
+        predictions = self.classes.take(np.argmax(probabilities, axis=1))
+        stages = np.where(uncertain, FOREST_STAGE, SCREEN_STAGE)
+        return predictions, probabilities, stages
+
+    def predict_with_proba(self, X):
+        """Return (predictions, probabilities) from a single pass"""
+        return self.predict_with_stages(X)[:2]
+
+    def predict_proba(self, X):
+        return self.predict_with_stages(X)[1]
+
+    def predict(self, X):
+        return self.predict_with_stages(X)[0]
+
+    def metrics(self):
+        """Rows scored so far and the share the forest had to decide"""
+        with self._lock:
+            rows, forest_rows = self._rows, self._forest_rows
+        return {
+            'band': [self.low, self.high],
+            'screen': self.screen_name,
+            'rows': rows,
+            'forest_rows': forest_rows,
+            'screened_fraction': (rows - forest_rows) / rows if rows else None
+        }
+
+
+def build_cascade(engine, screen, band, screen_trees=CASCADE_SCREEN_TREES):
+    """Wrap a forest engine in a cascade, or return it unchanged
+
+    `screen` is a LinearEngine taking the same (raw) input as `engine`, or
+    None to screen with the forest's first `screen_trees` trees. Without a
+    band, or for engines other than the compiled forest, there is no
+    cascade.
+    """
+    if band is None:
+        return engine
+    if not isinstance(engine, CompiledForest):
+        print("Cascade scoring needs the compiled forest engine; scoring without it")
+        return engine
+    if screen is None:
+        if not 0 < screen_trees < engine.n_trees:
+            print(f"Cascade screen needs between 1 and {engine.n_trees - 1} trees; scoring without it")
+            return engine
+        screen = tree_subset(engine, screen_trees)
+    cascade = CascadeEngine(screen, engine, *band)
+    print(f"Cascade scoring ready: {cascade.screen_name} screen, forest for "
+          f"P(default) in [{cascade.low}, {cascade.high}]")
+    return cascade
@@ -0,0 +1,131 @@
+"""
+Micro-batching coalescer for single-record predictions
+
+Concurrent /api/predict calls are queued for up to a few milliseconds (or
+until enough rows arrive), scored together as one matrix, and each caller
+gets its own row of the result back. Scoring 64 rows costs about the same
+as scoring one, so this trades a small, bounded delay for throughput.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class PredictionCoalescer:
+    """Queue single feature rows and score them in small batches"""
+
+    def __init__(self, max_wait_ms=2.0, max_batch_size=64):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = int(max_batch_size)
+        self._start()
+        # Threads do not survive fork(): pre-fork workers need their own
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._max_batch = 0
+        self._total_delay = 0.0
+        self._max_delay = 0.0
+        self._batch_histogram = {}
+        self._worker = threading.Thread(target=self._run, name='prediction-coalescer', daemon=True)
+        self._worker.start()
+
+    def submit(self, row, score_fn, timeout=None):
+        """Score one feature row; blocks until its batch has been scored
+
+        `score_fn(matrix) -> (predictions, probabilities, ...)` is the
+        scorer the caller validated the row against; the caller gets this
+        row of each returned array (None for outputs that are None). Rows
+        queued with different scorers (e.g. across a model swap) are never
+        scored together.
+        """
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64).ravel(), score_fn, time.perf_counter(), future))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        """Wait for the first row, then gather more until the batch is full or times out"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for score_fn, items in groups.items():
+                self._score(score_fn, items)
+            self._record(len(batch), [started - enqueued for _, _, enqueued, _ in batch])
+
+    def _score(self, score_fn, items):
+        """Score a group of rows; a bad row fails only its own caller"""
+        matrix = np.vstack([row for row, _, _, _ in items])
+        futures = [future for _, _, _, future in items]
+
+        try:
+            self._resolve(futures, score_fn(matrix))
+        except Exception as e:
+            if len(futures) == 1:
+                futures[0].set_exception(e)
+                return
+            # Find the offending rows by scoring the batch one row at a time
+            for i, future in enumerate(futures):
+                try:
+                    self._resolve([future], score_fn(matrix[i:i + 1]))
+                except Exception as row_error:
+                    future.set_exception(row_error)
+
+    @staticmethod
+    def _resolve(futures, outputs):
+        for i, future in enumerate(futures):
+            future.set_result(tuple(None if output is None else output[i] for output in outputs))
+
+    def _record(self, batch_size, delays):
+        with self._lock:
+            self._batches += 1
+            self._rows += batch_size
+            self._max_batch = max(self._max_batch, batch_size)
+            self._total_delay += sum(delays)
+            self._max_delay = max(self._max_delay, max(delays))
+            # Power-of-two buckets: 1, 2, 4, 8, ...
+            bucket = 1 << (batch_size - 1).bit_length()
+            self._batch_histogram[bucket] = self._batch_histogram.get(bucket, 0) + 1
+
+    def metrics(self):
+        """Batch size and queueing delay statistics since start"""
+        with self._lock:
+            metrics = {
+                'max_wait_ms': self.max_wait * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'batches': self._batches,
+                'rows': self._rows,
+                'mean_batch_size': self._rows / self._batches if self._batches else 0.0,
+                'largest_batch': self._max_batch,
+                'batch_size_histogram': {
+                    f'<={bucket}': count for bucket, count in sorted(self._batch_histogram.items())
+                },
+                'mean_queue_delay_ms': self._total_delay / self._rows * 1000.0 if self._rows else 0.0,
+                'max_queue_delay_ms': self._max_delay * 1000.0,
+                'queued': self._queue.qsize()
+            }
+        return metrics
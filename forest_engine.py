@@ -0,0 +1,231 @@
+"""
+Array-based inference engine for the trained RandomForest
+
+The sklearn forest is flattened once into contiguous NumPy node arrays so a
+whole batch can be pushed through every tree at the same time, without the
+per-call validation and joblib dispatch of ``predict`` / ``predict_proba``.
+"""
+
+import numpy as np
+
+# Rows scored per traversal step; keeps the (rows x trees) node index matrix small
+DEFAULT_CHUNK_SIZE = 512
+
+_SIGN_BIT = np.int64(-0x8000000000000000)
+
+
+def _float_to_key(x):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, _SIGN_BIT - bits, bits)
+
+
+def _key_to_float(key):
+    """Inverse of _float_to_key"""
+    bits = np.where(key < 0, _SIGN_BIT - key, key).astype(np.int64)
+    return bits.view(np.float64)
+
+
+def fold_thresholds(threshold, mean, scale):
+    """Translate scaled-space split thresholds back into raw feature units
+
+    sklearn sends a row left when ``float32((x - mean) / scale) <= threshold``.
+    That expression is monotone in ``x``, so the set of raw values going left
+    is ``x <= b`` for a single float64 boundary ``b``. The boundary is found
+    exactly by bisecting over the ordered float64 bit patterns, which keeps
+    fused predictions byte-identical to scaler + forest.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    mean = np.broadcast_to(np.asarray(mean, dtype=np.float64), threshold.shape)
+    scale = np.broadcast_to(np.asarray(scale, dtype=np.float64), threshold.shape)
+
+    def goes_left(x):
+        with np.errstate(over='ignore', invalid='ignore'):
+            scaled = ((x - mean) / scale).astype(np.float32)
+        return scaled <= threshold
+
+    max_value = np.finfo(np.float64).max
+    lo = np.full(threshold.shape, _float_to_key(-max_value), dtype=np.int64)
+    hi = np.full(threshold.shape, _float_to_key(max_value), dtype=np.int64)
+    always_left = goes_left(np.full(threshold.shape, max_value))
+    never_left = ~goes_left(np.full(threshold.shape, -max_value))
+
+    # Invariant: lo goes left, hi goes right
+    for _ in range(64):
+        # Overflow-free floor((lo + hi) / 2); the key range spans all of int64
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(_key_to_float(mid))
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+
+    boundary = _key_to_float(lo)
+    boundary[always_left] = np.inf
+    boundary[never_left] = -np.inf
+    return boundary
+
+
+class CompiledForest:
+    """Flat, read-only representation of a fitted RandomForestClassifier"""
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 classes, scaler_mean=None, scaler_scale=None, fused=False, missing_left=None):
+        self.feature = feature
+        self.threshold = threshold
+        # Per-node direction of rows whose split feature is NaN (sklearn's
+        # missing_go_to_left); None for forests that cannot score NaN
+        self.missing_left = missing_left
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = classes
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        # Fused forests hold raw-unit float64 thresholds and take unscaled input
+        self.fused = bool(fused)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None):
+        """Flatten a fitted RandomForestClassifier (and optional StandardScaler)"""
+        features, thresholds, children, values, roots, missing = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point back at themselves so every tree can be walked for
+            # the same number of steps regardless of its own depth
+            pair = np.empty(2 * n_nodes, dtype=np.int32)
+            pair[0::2] = np.where(is_leaf, node_ids, tree.children_left) + offset
+            pair[1::2] = np.where(is_leaf, node_ids, tree.children_right) + offset
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+            threshold = np.where(is_leaf, 0.0, tree.threshold).astype(np.float64)
+            # sklearn < 1.3 has no missing-value support and rejects NaN
+            missing_left = getattr(tree, 'missing_go_to_left', None)
+
+            # Store per-leaf class probabilities (older sklearn keeps raw counts)
+            value = tree.value[:, 0, :].astype(np.float64)
+            value = value / value.sum(axis=1, keepdims=True)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(pair)
+            values.append(value)
+            roots.append(offset)
+            missing.append(None if missing_left is None else np.asarray(missing_left, dtype=bool))
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        scaler_mean = scaler_scale = None
+        if scaler is not None:
+            scaler_mean = np.asarray(scaler.mean_, dtype=np.float64)
+            scaler_scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            children=np.ascontiguousarray(np.concatenate(children)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            scaler_mean=scaler_mean,
+            scaler_scale=scaler_scale,
+            missing_left=None if any(m is None for m in missing)
+            else np.ascontiguousarray(np.concatenate(missing)),
+        )
+
+    def fuse_scaler(self):
+        """Return a copy with the scaler folded into the split thresholds
+
+        The fused forest takes raw feature vectors directly and skips both
+        the affine transform and the float32 cast on every request. NaN
+        stays NaN through the scaler, so missing values keep their routing.
+        """
+        if self.fused or self.scaler_mean is None:
+            return self
+        internal = self.children[0::2] != np.arange(self.n_nodes)
+        threshold = self.threshold.copy()
+        feature = self.feature[internal]
+        threshold[internal] = fold_thresholds(
+            self.threshold[internal],
+            self.scaler_mean[feature],
+            self.scaler_scale[feature],
+        )
+        return CompiledForest(
+            feature=self.feature,
+            threshold=threshold,
+            children=self.children,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            classes=self.classes,
+            fused=True,
+            missing_left=self.missing_left,
+        )
+
+    def _prepare(self, X):
+        """Apply the scaler (if any) and match sklearn's float32 split inputs"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        # Like sklearn, NaN is a missing value when the trees know where to
+        # send it; infinity is always rejected
+        if np.isinf(X).any() or (self.missing_left is None and np.isnan(X).any()):
+            raise ValueError("Input contains NaN or infinity")
+        if self.fused:
+            return np.ascontiguousarray(X)
+        if self.scaler_mean is not None:
+            X = (X - self.scaler_mean) / self.scaler_scale
+        # sklearn trees compare float32 features against float64 thresholds
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _leaf_values(self, X):
+        """Walk every tree for a chunk of prepared rows and average leaf values"""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        # One (row, tree) cursor per entry, laid out row-major
+        nodes = np.tile(self.roots, n_rows)
+        row_base = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+        has_missing = self.missing_left is not None and np.isnan(flat).any()
+        for _ in range(self.max_depth):
+            x = flat.take(row_base + self.feature.take(nodes))
+            go_right = x > self.threshold.take(nodes)
+            if has_missing:
+                # NaN compares False (left); send it where the split learned to
+                go_right |= np.isnan(x) & ~self.missing_left.take(nodes)
+            nodes = self.children.take(2 * nodes + go_right)
+        leaf_values = self.value.take(nodes, axis=0).reshape(n_rows, self.n_trees, self.value.shape[1])
+        return leaf_values.sum(axis=1) / self.n_trees
+
+    def predict_proba(self, X, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Class probabilities, equivalent to RandomForestClassifier.predict_proba"""
+        X = self._prepare(X)
+        if X.shape[0] <= chunk_size:
+            return self._leaf_values(X)
+        return np.concatenate([
+            self._leaf_values(X[start:start + chunk_size])
+            for start in range(0, X.shape[0], chunk_size)
+        ])
+
+    def predict_with_proba(self, X, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Predicted classes and probabilities from a single traversal"""
+        probabilities = self.predict_proba(X, chunk_size=chunk_size)
+        return self.classes.take(np.argmax(probabilities, axis=1)), probabilities
+
+    def predict(self, X, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Predicted classes, equivalent to RandomForestClassifier.predict"""
+        return self.predict_with_proba(X, chunk_size=chunk_size)[0]
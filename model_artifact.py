@@ -0,0 +1,154 @@
+"""
+Memory-mapped model artifact format
+
+A single file holding the flattened forest node arrays, scaler parameters
+and feature columns. Arrays are stored raw at 64-byte aligned offsets and
+are opened with np.memmap read-only, so every worker process shares one
+physical copy through the page cache and startup does not unpickle
+anything.
+
+Layout::
+
+    b'CCMODEL1' | uint64 header length | JSON header | padding | arrays...
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from forest_engine import CompiledForest
+from linear_engine import LinearEngine
+
+MAGIC = b'CCMODEL1'
+# Version 2 added the per-node missing-value directions ('missing_left')
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+ARTIFACT_PATH = 'credit_card_model.forest'
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_artifact(path, model_data, version=None):
+    """Write a {model, scaler, feature_columns} bundle as a memory-mappable artifact"""
+    model = model_data['model']
+    scaler = model_data['scaler']
+    forest = CompiledForest.from_sklearn(model, scaler)
+    fused = forest.fuse_scaler()
+
+    arrays = {
+        'feature': forest.feature,
+        'threshold': forest.threshold,
+        'fused_threshold': fused.threshold,
+        'children': forest.children,
+        'value': forest.value,
+        'roots': forest.roots,
+        'scaler_mean': forest.scaler_mean,
+        'scaler_scale': forest.scaler_scale,
+    }
+    if forest.missing_left is not None:
+        arrays['missing_left'] = forest.missing_left
+
+    importances = getattr(model, 'feature_importances_', None)
+    header = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'model_type': type(model).__name__,
+        'feature_columns': list(model_data['feature_columns']),
+        'classes': np.asarray(forest.classes).tolist(),
+        'max_depth': forest.max_depth,
+        'feature_importance': np.asarray(importances, dtype=float).tolist() if importances is not None else None,
+        'hyperparameters': model_data.get('hyperparameters'),
+        'data_segments': model_data.get('data_segments'),
+        'screen': _screen_header(model_data),
+        'arrays': {},
+    }
+
+    # Offsets are relative to the start of the data section, which begins at
+    # the first aligned position after the header
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        header['arrays'][name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def _screen_header(model_data):
+    """Cascade screening model folded onto raw features, or None"""
+    screen_model = model_data.get('screen_model')
+    if screen_model is None:
+        return None
+    screen = LinearEngine.from_sklearn(screen_model, model_data['scaler'])
+    return {
+        'weights': screen.weights.tolist(),
+        'bias': screen.bias,
+        'classes': np.asarray(screen.classes).tolist()
+    }
+
+
+def read_header(path):
+    """Read the JSON header of an artifact; returns (header, data_start)"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a model artifact')
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {header.get('format_version')}")
+    return header, _align(len(MAGIC) + 8 + header_length)
+
+
+def load_artifact(path, fused=True):
+    """Memory-map an artifact; returns (CompiledForest, header)
+
+    With `fused=True` the forest takes raw feature vectors; otherwise it
+    applies the stored scaler parameters itself.
+    """
+    header, data_start = read_header(path)
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def array(name):
+        spec = header['arrays'][name]
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        view = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + spec['offset'])
+        return view.reshape(spec['shape'])
+
+    forest = CompiledForest(
+        feature=array('feature'),
+        threshold=array('fused_threshold') if fused else array('threshold'),
+        children=array('children'),
+        value=array('value'),
+        roots=array('roots'),
+        max_depth=header['max_depth'],
+        classes=np.asarray(header['classes']),
+        scaler_mean=None if fused else array('scaler_mean'),
+        scaler_scale=None if fused else array('scaler_scale'),
+        fused=fused,
+        missing_left=array('missing_left') if 'missing_left' in header['arrays'] else None,
+    )
+    # Scaler parameters are exposed either way for callers that need them
+    header['scaler_mean'] = array('scaler_mean')
+    header['scaler_scale'] = array('scaler_scale')
+    return forest, header
@@ -0,0 +1,239 @@
+"""
+Immutable model bundles for serving
+
+A bundle groups everything one prediction needs (model, scaler, feature
+columns, compiled engine, cached metadata) under a single version id. The
+API swaps whole bundles behind one reference, so a request never mixes a
+new model with an old scaler.
+"""
+
+import hashlib
+import pickle
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from cascade import CascadeEngine, build_cascade
+from forest_engine import CompiledForest
+from linear_engine import LinearEngine
+from model_artifact import load_artifact
+from xgboost_engine import XGBoostEngine, is_xgboost_model
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Everything needed to score requests with one model version"""
+
+    version: str
+    model: object
+    scaler: object
+    feature_columns: tuple
+    engine: object = None
+    feature_importance: dict = None
+    features_info: tuple = ()
+    source: str = None
+    model_type: str = None
+    hyperparameters: dict = None
+    data_segments: tuple = ()
+    loaded_at: float = field(default_factory=time.time)
+
+    def predict_with_probabilities(self, input_data):
+        """Predict classes and probabilities for rows already in feature_columns order"""
+        if self.engine is not None:
+            return self.engine.predict_with_proba(input_data)
+
+        input_scaled = self.scaler.transform(input_data)
+        probabilities = self.model.predict_proba(input_scaled)
+        predictions = self.model.classes_.take(np.argmax(probabilities, axis=1))
+        return predictions, probabilities
+
+    def predict_with_stages(self, input_data):
+        """Like predict_with_probabilities, plus the cascade stage that decided each row
+
+        Returns (predictions, probabilities, stages); stages is None when
+        the bundle does not score with a cascade.
+        """
+        predict = getattr(self.engine, 'predict_with_stages', None)
+        if predict is None:
+            return self.predict_with_probabilities(input_data) + (None,)
+        return predict(input_data)
+
+    def describe(self):
+        """Short JSON-friendly summary of the bundle"""
+        return {
+            'version': self.version,
+            'model_type': self.model_type or type(self.model).__name__,
+            'engine': engine_name(self.engine),
+            'total_features': len(self.feature_columns),
+            'source': self.source,
+            'hyperparameters': self.hyperparameters,
+            'data_segments': list(self.data_segments),
+            'cascade': self.engine.metrics() if engine_name(self.engine) == 'cascade' else None,
+            'loaded_at': self.loaded_at
+        }
+
+
+def model_version(payload):
+    """Content-derived version id: same artifact bytes -> same version"""
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def engine_name(engine):
+    """Name of the inference path a bundle uses"""
+    if engine is None:
+        return 'sklearn'
+    return getattr(engine, 'name', None) or ('fused' if engine.fused else 'compiled')
+
+
+def compile_engine(model, scaler, engine_kind='fused'):
+    """Build the fast inference engine for a model, or return None
+
+    `engine_kind` is 'fused' (scaler folded into thresholds), 'compiled'
+    or 'sklearn' (no engine). RandomForests get the array engine;
+    XGBoost classifiers are served through their native booster and
+    logistic regressions as one folded weight vector either way.
+    """
+    if engine_kind not in ('fused', 'compiled'):
+        return None
+    if isinstance(model, LogisticRegression):
+        try:
+            engine = LinearEngine.from_sklearn(model, scaler)
+            print(f"Linear scoring engine ready ({len(engine.weights)} folded weights)")
+            return engine
+        except Exception as e:
+            print(f"Linear engine unavailable, falling back to sklearn: {e}")
+            return None
+    if is_xgboost_model(model):
+        try:
+            engine = XGBoostEngine.from_sklearn(model, scaler)
+            print(f"XGBoost booster engine ready ({engine.n_trees} rounds, nthread={engine.nthread or 'auto'})")
+            return engine
+        except Exception as e:
+            print(f"XGBoost engine unavailable, falling back to sklearn: {e}")
+            return None
+    if not isinstance(model, RandomForestClassifier):
+        return None
+    try:
+        engine = CompiledForest.from_sklearn(model, scaler)
+        if engine_kind == 'fused':
+            engine = engine.fuse_scaler()
+        print(f"{engine_kind.capitalize()} inference engine ready ({engine.n_trees} trees, {engine.n_nodes} nodes)")
+        return engine
+    except Exception as e:
+        print(f"Compiled engine unavailable, falling back to sklearn: {e}")
+        return None
+
+
+def build_bundle(model_data, engine_kind='fused', feature_descriptions=None,
+                 version=None, source=None, cascade_band=None):
+    """Build and warm up a bundle from a {model, scaler, feature_columns} dict
+
+    All the expensive work (engine compilation, importances, a warm-up
+    prediction) happens here, before the bundle is published. With a
+    `cascade_band` (low, high) the forest is put behind a cascade screen
+    (see cascade.py).
+    """
+    model = model_data['model']
+    scaler = model_data['scaler']
+    feature_columns = tuple(model_data['feature_columns'])
+    feature_descriptions = feature_descriptions or {}
+
+    if version is None:
+        version = model_version(pickle.dumps(model_data))
+
+    # sklearn recomputes feature_importances_ across all trees on every
+    # access, so it is read once per bundle
+    importances = getattr(model, 'feature_importances_', None)
+
+    engine = compile_engine(model, scaler, engine_kind)
+    if cascade_band is not None:
+        screen = None
+        if model_data.get('screen_model') is not None:
+            screen = LinearEngine.from_sklearn(model_data['screen_model'], scaler)
+        engine = build_cascade(engine, screen, cascade_band)
+
+    bundle = ModelBundle(
+        version=version,
+        model=model,
+        scaler=scaler,
+        feature_columns=feature_columns,
+        engine=engine,
+        feature_importance=_importance_dict(feature_columns, importances),
+        features_info=_features_info(feature_columns, feature_descriptions),
+        source=source,
+        hyperparameters=model_data.get('hyperparameters'),
+        data_segments=tuple(model_data.get('data_segments') or ())
+    )
+    return _warm_up(bundle)
+
+
+def bundle_from_artifact(path, engine_kind='fused', feature_descriptions=None, cascade_band=None):
+    """Build a bundle from a memory-mapped artifact (see model_artifact.py)
+
+    The forest arrays stay memory-mapped, so processes loading the same
+    file share them. There is no sklearn model object; the scaler is
+    rebuilt from the stored mean/scale for callers that need it.
+    """
+    forest, header = load_artifact(path, fused=engine_kind != 'compiled')
+    engine = forest
+    if cascade_band is not None:
+        screen = header.get('screen')
+        if screen is not None:
+            screen = LinearEngine(screen['weights'], screen['bias'], screen['classes'])
+        engine = build_cascade(forest, screen, cascade_band)
+    feature_columns = tuple(header['feature_columns'])
+
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(header['scaler_mean'])
+    scaler.scale_ = np.asarray(header['scaler_scale'])
+    scaler.var_ = scaler.scale_ ** 2
+    scaler.n_features_in_ = len(feature_columns)
+
+    bundle = ModelBundle(
+        version=header['version'] or model_version(open(path, 'rb').read()),
+        model=None,
+        scaler=scaler,
+        feature_columns=feature_columns,
+        engine=engine,
+        feature_importance=_importance_dict(feature_columns, header['feature_importance']),
+        features_info=_features_info(feature_columns, feature_descriptions or {}),
+        source=path,
+        model_type=header['model_type'],
+        hyperparameters=header.get('hyperparameters'),
+        data_segments=tuple(header.get('data_segments') or ())
+    )
+    print(f"Memory-mapped model artifact {path} ({forest.n_trees} trees, {forest.n_nodes} nodes)")
+    return _warm_up(bundle)
+
+
+def _importance_dict(feature_columns, importances):
+    if importances is None:
+        return None
+    return dict(zip(feature_columns, np.asarray(importances, dtype=float).tolist()))
+
+
+def _features_info(feature_columns, feature_descriptions):
+    return tuple(
+        {
+            'name': feature,
+            'description': feature_descriptions.get(feature, 'Feature description not available')
+        }
+        for feature in feature_columns
+    )
+
+
+def _warm_up(bundle):
+    """Touch every code path once so the first real request is not slower"""
+    row = np.zeros((1, len(bundle.feature_columns)))
+    if isinstance(bundle.engine, CascadeEngine):
+        # Warm both stages directly; a row through the cascade itself would
+        # show up in its screened/forest counters
+        bundle.engine.screen.predict_proba(row)
+        bundle.engine.full.predict_proba(row)
+    else:
+        bundle.predict_with_probabilities(row)
+    return bundle
@@ -0,0 +1,210 @@
+"""
+Registry of named models served side by side
+
+All models in a registry were trained on the same scaled features (one
+StandardScaler), so a request is scaled once and the same matrix is fed to
+every selected model. Models are evaluated in parallel threads and can be
+combined into an average or weighted ensemble.
+"""
+
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from forest_engine import CompiledForest
+from linear_engine import LinearEngine
+from model_bundle import engine_name, model_version
+from xgboost_engine import XGBoostEngine, is_xgboost_model
+
+ENSEMBLE_METHODS = ('average', 'weighted')
+
+# Threads evaluating models of one request in parallel. Tree traversal and
+# NumPy kernels release the GIL, so models overlap on multi-core machines.
+ENSEMBLE_THREADS = int(os.getenv('ENSEMBLE_THREADS', str(min(8, os.cpu_count() or 1))))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Thread pool shared by all registries, created on first use
+
+    Created lazily so pre-forked workers each start their own threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ENSEMBLE_THREADS, thread_name_prefix='ensemble')
+    return _executor
+
+
+@dataclass(frozen=True)
+class ModelRegistry:
+    """Named models sharing one scaler and feature order"""
+
+    version: str
+    scaler: object
+    feature_columns: tuple
+    models: dict
+    engines: dict = field(default_factory=dict)
+    weights: dict = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+    source: str = None
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def names(self):
+        return list(self.models)
+
+    def scale(self, input_data):
+        """Standardize rows in feature_columns order (same arithmetic as StandardScaler.transform)"""
+        X = np.asarray(input_data, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return (X - self.scaler.mean_) / self.scaler.scale_
+
+    def predict_proba(self, name, scaled):
+        """Class probabilities of one model for an already scaled matrix"""
+        engine = self.engines.get(name)
+        if engine is not None:
+            return engine.predict_proba(scaled)
+        return self.models[name].predict_proba(scaled)
+
+    def predict(self, input_data, names=None, ensemble=None, weights=None):
+        """Score rows with several models (and optionally their ensemble)
+
+        Returns a dict with the shared preprocessing time, per-model
+        {'probabilities', 'latency_ms'} and, when `ensemble` is 'average'
+        or 'weighted', the combined {'method', 'weights', 'probabilities'}.
+        Weighted ensembles use `weights` (name -> weight) or the registry's
+        validation-based defaults.
+        """
+        names = list(names or self.names)
+        unknown = [name for name in names if name not in self.models]
+        if unknown:
+            raise ValueError(f'Unknown models: {unknown}. Available: {self.names}')
+        if ensemble is not None and ensemble not in ENSEMBLE_METHODS:
+            raise ValueError(f'Unknown ensemble method: {ensemble}. Use one of {list(ENSEMBLE_METHODS)}')
+
+        started = time.perf_counter()
+        scaled = self.scale(input_data)
+        preprocessing_ms = (time.perf_counter() - started) * 1000.0
+
+        def run(name):
+            model_started = time.perf_counter()
+            probabilities = self.predict_proba(name, scaled)
+            return name, probabilities, (time.perf_counter() - model_started) * 1000.0
+
+        if len(names) == 1:
+            results = [run(names[0])]
+        else:
+            results = list(_get_executor().map(run, names))
+
+        result = {
+            'preprocessing_ms': preprocessing_ms,
+            'models': {
+                name: {'probabilities': probabilities, 'latency_ms': latency_ms}
+                for name, probabilities, latency_ms in results
+            }
+        }
+
+        if ensemble is not None:
+            if ensemble == 'weighted':
+                source = weights if weights is not None else self.weights
+                missing = [name for name in names if name not in source]
+                if missing:
+                    raise ValueError(f'Missing ensemble weights for: {missing}')
+                raw = np.array([float(source[name]) for name in names])
+            else:
+                raw = np.ones(len(names))
+            if (raw < 0).any() or raw.sum() <= 0:
+                raise ValueError('Ensemble weights must be non-negative and not all zero')
+            normalized = raw / raw.sum()
+            stacked = np.stack([probabilities for _, probabilities, _ in results])
+            result['ensemble'] = {
+                'method': ensemble,
+                'weights': dict(zip(names, normalized.tolist())),
+                'probabilities': np.tensordot(normalized, stacked, axes=1)
+            }
+
+        result['total_ms'] = (time.perf_counter() - started) * 1000.0
+        return result
+
+    def describe(self):
+        """Short JSON-friendly summary of the registry"""
+        return {
+            'version': self.version,
+            'models': {
+                name: {
+                    'model_type': type(model).__name__,
+                    'engine': engine_name(self.engines.get(name)),
+                    'weight': self.weights.get(name),
+                    'metrics': self.metrics.get(name)
+                }
+                for name, model in self.models.items()
+            },
+            'ensemble_methods': list(ENSEMBLE_METHODS),
+            'total_features': len(self.feature_columns),
+            'source': self.source,
+            'loaded_at': self.loaded_at
+        }
+
+
+def build_registry(suite_data, version=None, source=None):
+    """Build and warm up a registry from a saved model suite
+
+    `suite_data` is {scaler, feature_columns, models: {name: model},
+    metrics: {name: {...}}} as written by training.save_model_suite().
+    Random forests are compiled into the array engine, XGBoost models use
+    their native booster and logistic regressions a plain dot product (all
+    on the shared scaled input).
+    Default ensemble weights are the models' validation ROC AUC.
+    """
+    models = dict(suite_data['models'])
+    metrics = dict(suite_data.get('metrics') or {})
+    engines = {}
+    for name, model in models.items():
+        try:
+            if isinstance(model, RandomForestClassifier):
+                engines[name] = CompiledForest.from_sklearn(model)
+            elif is_xgboost_model(model):
+                engines[name] = XGBoostEngine.from_sklearn(model)
+            elif isinstance(model, LogisticRegression):
+                engines[name] = LinearEngine.from_sklearn(model)
+        except Exception as e:
+            print(f"Compiled engine unavailable for {name}, using sklearn: {e}")
+
+    weights = {
+        name: float(metrics[name]['roc_auc'])
+        for name in models
+        if name in metrics and metrics[name].get('roc_auc') is not None
+    }
+
+    if version is None:
+        version = model_version(pickle.dumps(suite_data))
+
+    registry = ModelRegistry(
+        version=version,
+        scaler=suite_data['scaler'],
+        feature_columns=tuple(suite_data['feature_columns']),
+        models=models,
+        engines=engines,
+        weights=weights,
+        metrics=metrics,
+        source=source
+    )
+
+    # Warm up every model before the registry is published. This runs
+    # inline rather than on the thread pool, which must not exist yet in a
+    # pre-fork master process.
+    scaled = registry.scale(np.zeros(len(registry.feature_columns)))
+    for name in registry.names:
+        registry.predict_proba(name, scaled)
+    return registry
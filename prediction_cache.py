@@ -0,0 +1,80 @@
+"""
+Prediction result cache for single-record predictions
+
+Upstream systems often re-score the same account snapshot (retries,
+dashboards, duplicate events). Results are cached under a hash of the
+packed feature row plus the model version, so a new model never serves an
+old answer. The cache is a bounded LRU with a time-to-live per entry.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def row_key(version, row):
+    """Cache key of a packed float64 feature row for one model version"""
+    # Adding 0.0 turns -0.0 into 0.0, so both spellings share an entry
+    row = np.ascontiguousarray(np.asarray(row, dtype=np.float64) + 0.0)
+    return version, hashlib.blake2b(row.tobytes(), digest_size=16).digest()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        """Cached value for `key`, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        """Hit/miss counters since start"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
@@ -0,0 +1,234 @@
+"""
+Pre-fork multi-worker server for the Flask API
+
+The master process loads the model once, opens the listening socket and
+forks N workers that inherit both. Model pages (including the
+memory-mapped forest arrays) are shared copy-on-write, and each worker
+has its own GIL. Workers are recycled after a configurable number of
+requests, and SIGHUP replaces all of them one by one without dropping
+the listening socket. POSIX only.
+"""
+
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+# Seconds a stopping worker waits for in-flight requests to finish
+GRACEFUL_TIMEOUT = 30
+
+# Extra seconds the master waits for a signalled worker before SIGKILL
+KILL_GRACE = 5
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class _RequestTracker:
+    """WSGI middleware counting handled and in-flight requests
+
+    A request is in flight until the server closes its response iterable,
+    so streamed responses count until their last chunk is sent. Open
+    connections are counted too (see _run_worker). Once the worker is stopping (request limit reached or SIGTERM), responses
+    carry "Connection: close" so keep-alive clients reconnect to another
+    worker instead of reusing a socket that is about to go away.
+    """
+
+    def __init__(self, app, max_requests, stopping):
+        self.app = app
+        self.max_requests = max_requests
+        self.stopping = stopping
+        self.handled = 0
+        self.active = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.active += 1
+            self.handled += 1
+            if self.max_requests and self.handled >= self.max_requests:
+                self.stopping.set()
+
+        def close_when_stopping(status, headers, exc_info=None):
+            if self.stopping.is_set():
+                headers = [(k, v) for k, v in headers if k.lower() != 'connection']
+                headers.append(('Connection', 'close'))
+            return start_response(status, headers, exc_info)
+
+        try:
+            response = self.app(environ, close_when_stopping)
+        except BaseException:
+            self._finished()
+            raise
+        return ClosingIterator(response, self._finished)
+
+    def _finished(self):
+        with self.lock:
+            self.active -= 1
+
+    @property
+    def busy(self):
+        with self.lock:
+            return self.active > 0 or self.connections > 0
+
+
+def _run_worker(app, host, port, listen_fd, max_requests, on_worker_start, on_worker_exit):
+    """Serve requests on the inherited socket until told to stop"""
+    stopping = threading.Event()
+    tracker = _RequestTracker(app, max_requests, stopping)
+    server = make_server(host, port, tracker, threaded=True, fd=listen_fd)
+    # Every worker is woken for each new connection; the ones losing the race
+    # must not block in accept(), or they could never notice a shutdown.
+    # socketserver treats the resulting BlockingIOError as "no request".
+    server.socket.setblocking(False)
+
+    # Count open connections, so a stopping worker also waits for requests
+    # that were accepted but have not reached the app yet
+    finish_request = server.finish_request
+
+    def tracked_finish_request(request, client_address):
+        with tracker.lock:
+            tracker.connections += 1
+        try:
+            finish_request(request, client_address)
+        finally:
+            with tracker.lock:
+                tracker.connections -= 1
+
+    server.finish_request = tracked_finish_request
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+    if on_worker_start is not None:
+        on_worker_start()
+
+    def stop_when_asked():
+        stopping.wait()
+        server.shutdown()
+
+    threading.Thread(target=stop_when_asked, daemon=True).start()
+    server.serve_forever()
+
+    # Let in-flight requests and open connections finish before exiting
+    deadline = time.time() + GRACEFUL_TIMEOUT
+    while tracker.busy and time.time() < deadline:
+        time.sleep(0.05)
+
+    if on_worker_exit is not None:
+        on_worker_exit()
+
+
+def serve_prefork(app, host='0.0.0.0', port=5000, workers=None, max_requests=0,
+                  before_fork=None, on_worker_start=None, on_worker_exit=None):
+    """Run `app` with a pre-forked pool of worker processes
+
+    `before_fork()` runs once in the master (load the model there) and
+    `on_worker_start()` runs in every worker after it is forked, and
+    `on_worker_exit()` when it stops, after in-flight requests finished.
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError('Pre-fork mode needs os.fork (not available on Windows)')
+
+    workers = workers or default_workers()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(1024)
+    listener.set_inheritable(True)
+
+    if before_fork is not None:
+        before_fork()
+
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    state = {'stopping': False}
+    # Workers sent SIGTERM -> time after which they are killed
+    kill_deadlines = {}
+
+    def terminate(pid):
+        kill_deadlines[pid] = time.time() + GRACEFUL_TIMEOUT + KILL_GRACE
+        _signal_child(pid, signal.SIGTERM)
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                _run_worker(app, host, port, listener.fileno(), max_requests,
+                            on_worker_start, on_worker_exit)
+            except Exception as e:
+                print(f"Worker {os.getpid()} crashed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        children.add(pid)
+        return pid
+
+    def handle_stop(signum, frame):
+        state['stopping'] = True
+        for pid in list(children):
+            terminate(pid)
+
+    def handle_recycle(signum, frame):
+        if state['stopping']:
+            return
+        # Replace workers one at a time so capacity never drops to zero
+        print("Recycling all workers")
+        for pid in list(children):
+            spawn()
+            terminate(pid)
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGHUP, handle_recycle)
+
+    print(f"Pre-fork server on http://{host}:{port} with {workers} workers "
+          f"(max requests per worker: {max_requests or 'unlimited'})")
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            # Workers that outlive their graceful timeout are killed
+            now = time.time()
+            for child, deadline in list(kill_deadlines.items()):
+                if now >= deadline and child in children:
+                    print(f"Worker {child} did not stop in time; killing it")
+                    _signal_child(child, signal.SIGKILL)
+                    del kill_deadlines[child]
+            time.sleep(0.1)
+            continue
+        children.discard(pid)
+        kill_deadlines.pop(pid, None)
+        if not state['stopping']:
+            # Worker exited (request limit, crash or recycle): keep the pool full
+            while len(children) < workers:
+                spawn()
+
+    listener.close()
+    print("Pre-fork server stopped")
+
+
+def _signal_child(pid, signum):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
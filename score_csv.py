@@ -0,0 +1,237 @@
+"""
+Bulk offline scoring for Credit Card Default Prediction
+
+Scores a CSV shaped like UCI_Credit_Card.csv with the trained model bundle
+and writes ID, prediction and class probabilities to CSV or Parquet. The
+input is read in chunks and scored by a pool of worker processes, with a
+bounded number of chunks in flight, so memory stays flat however large the
+file is.
+
+Usage:
+    python score_csv.py accounts.csv scores.csv
+    python score_csv.py accounts.csv scores.parquet --workers 8 --chunk-size 200000
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_artifact import ARTIFACT_PATH
+from model_bundle import build_bundle, bundle_from_artifact, model_version
+from training import MODEL_PATH
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DEFAULT_CHUNK_SIZE = 100_000
+ID_COLUMN = 'ID'
+
+# Bundle loaded once per worker process (set by init_worker)
+_bundle = None
+
+
+def load_bundle(model_path=MODEL_PATH, artifact_path=ARTIFACT_PATH, engine_kind='fused'):
+    """Load the model bundle, preferring the memory-mapped artifact like the API does"""
+    if (engine_kind != 'sklearn' and artifact_path and os.path.exists(artifact_path)
+            and (not os.path.exists(model_path)
+                 or os.path.getmtime(artifact_path) >= os.path.getmtime(model_path))):
+        try:
+            return bundle_from_artifact(artifact_path, engine_kind=engine_kind)
+        except ValueError as e:
+            if not os.path.exists(model_path):
+                raise
+            print(f"Model artifact unusable ({e}); loading the pickle instead")
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f'{model_path} not found. Please train the model first.')
+    with open(model_path, 'rb') as f:
+        payload = f.read()
+    return build_bundle(pickle.loads(payload), engine_kind=engine_kind,
+                        version=model_version(payload), source=model_path)
+
+
+def init_worker(model_path, artifact_path, engine_kind):
+    """ProcessPoolExecutor initializer: load the bundle once per worker"""
+    global _bundle
+    _bundle = load_bundle(model_path, artifact_path, engine_kind)
+
+
+def score_chunk(matrix):
+    """Worker entry point: score one chunk, returns (predictions, probabilities)"""
+    return _bundle.predict_with_probabilities(matrix)
+
+
+def read_chunks(path, feature_columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (ids, feature matrix) chunks from a CSV
+
+    `path` is a file path or a seekable binary file object (e.g. an
+    upload). Uses pyarrow's streaming CSV reader when available, pandas
+    otherwise. Only the ID and feature columns are parsed.
+    """
+    columns = list(feature_columns)
+
+    if pa is not None:
+        # Column names are only known after the header has been read, so
+        # peek at it to decide whether the ID column is present
+        header = pd.read_csv(path, nrows=0).columns
+        if hasattr(path, 'seek'):
+            path.seek(0)
+        wanted = ([ID_COLUMN] if ID_COLUMN in header else []) + columns
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f'Missing features: {missing}')
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=1 << 24),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=wanted,
+                column_types={column: pa.float64() for column in columns}
+            )
+        )
+        buffered = []
+        buffered_rows = 0
+        for batch in reader:
+            buffered.append(batch)
+            buffered_rows += batch.num_rows
+            if buffered_rows < chunk_size:
+                continue
+            table = pa.Table.from_batches(buffered)
+            while table.num_rows >= chunk_size:
+                yield _arrow_chunk(table.slice(0, chunk_size), columns)
+                table = table.slice(chunk_size)
+            buffered = table.to_batches()
+            buffered_rows = table.num_rows
+        if buffered_rows:
+            yield _arrow_chunk(pa.Table.from_batches(buffered), columns)
+        return
+
+    for df in pd.read_csv(path, chunksize=chunk_size):
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise ValueError(f'Missing features: {missing}')
+        ids = df[ID_COLUMN].to_numpy() if ID_COLUMN in df.columns else None
+        yield ids, df[columns].to_numpy(dtype=np.float64)
+
+
+def _arrow_chunk(table, columns):
+    ids = table.column(ID_COLUMN).to_numpy() if ID_COLUMN in table.column_names else None
+    matrix = np.column_stack([table.column(column).to_numpy() for column in columns])
+    return ids, matrix
+
+
+class ResultWriter:
+    """Append scored chunks to a CSV or Parquet file (chosen by extension)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.lower().endswith(('.parquet', '.pq'))
+        if self.parquet and pa is None:
+            raise RuntimeError('Writing Parquet needs pyarrow (pip install pyarrow)')
+        self.parquet_writer = None
+        self.wrote_header = False
+
+    def write(self, ids, first_row, predictions, probabilities):
+        if ids is None:
+            ids = np.arange(first_row + 1, first_row + len(predictions) + 1)
+        frame = pd.DataFrame({
+            ID_COLUMN: ids,
+            'prediction': np.asarray(predictions, dtype=np.int64),
+            'no_default': probabilities[:, 0],
+            'default': probabilities[:, 1]
+        })
+
+        if self.parquet:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self.wrote_header else 'w',
+                         header=not self.wrote_header, index=False)
+            self.wrote_header = True
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def score_csv(input_path, output_path, model_path=MODEL_PATH, artifact_path=ARTIFACT_PATH,
+              engine_kind='fused', workers=None, chunk_size=DEFAULT_CHUNK_SIZE, quiet=False):
+    """Score `input_path` into `output_path`; returns the number of rows scored"""
+    workers = workers or os.cpu_count() or 1
+    bundle = load_bundle(model_path, artifact_path, engine_kind)
+    print(f"Scoring {input_path} with model version {bundle.version} "
+          f"({workers} workers, {chunk_size} rows per chunk)", file=sys.stderr)
+
+    started = time.time()
+    rows = 0
+    writer = ResultWriter(output_path)
+    # Keep a couple of chunks per worker in flight: enough to keep every
+    # process busy, few enough that memory does not grow with the file
+    max_in_flight = 2 * workers
+    pending = deque()
+
+    def drain_one():
+        nonlocal rows
+        ids, first_row, future = pending.popleft()
+        predictions, probabilities = future.result()
+        writer.write(ids, first_row, predictions, probabilities)
+        rows += len(predictions)
+        if not quiet:
+            elapsed = time.time() - started
+            print(f"\r{rows:,} rows scored, {rows / max(elapsed, 1e-9):,.0f} rows/s",
+                  end='', file=sys.stderr, flush=True)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(model_path, artifact_path, engine_kind)) as pool:
+            submitted = 0
+            for ids, matrix in read_chunks(input_path, bundle.feature_columns, chunk_size):
+                if len(pending) >= max_in_flight:
+                    drain_one()
+                pending.append((ids, submitted, pool.submit(score_chunk, matrix)))
+                submitted += len(matrix)
+            while pending:
+                drain_one()
+    finally:
+        writer.close()
+
+    elapsed = time.time() - started
+    print(f"\nScored {rows:,} rows in {elapsed:.2f}s "
+          f"({rows / max(elapsed, 1e-9) * 60:,.0f} rows/min) -> {output_path}", file=sys.stderr)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV of accounts with the trained model")
+    parser.add_argument('input', help='CSV with the model feature columns (and optionally ID)')
+    parser.add_argument('output', help='Output file: .csv, or .parquet for Parquet')
+    parser.add_argument('--model', default=MODEL_PATH, help='Pickled model bundle')
+    parser.add_argument('--artifact', default=ARTIFACT_PATH, help='Memory-mapped model artifact')
+    parser.add_argument('--engine', default='fused', choices=['fused', 'compiled', 'sklearn'])
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk')
+    parser.add_argument('--quiet', action='store_true', help='No per-chunk progress output')
+    args = parser.parse_args()
+
+    try:
+        score_csv(args.input, args.output, args.model, args.artifact, args.engine,
+                  args.workers, args.chunk_size, args.quiet)
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,50 @@
 """
 Simple Flask startup script
+
+    python start_flask.py                     # development server (default)
+    python start_flask.py --prefork           # pre-fork workers, one per core
+    python start_flask.py --prefork --workers 4 --max-requests 10000
 """
 
+import argparse
 import os
 import sys
 
 # Add current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Credit Card Default Prediction Flask API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--prefork', action='store_true',
+                        help='Production mode: load the model once and fork worker processes')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of pre-fork workers (default: number of CPU cores)')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Recycle a worker after this many requests (default: never)')
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    from app import app
+    args = parse_args()
+    from app import app, reload_model, watch_model_files, shutdown_training_executor
     print("Starting Credit Card Default Prediction Flask API...")
-    print("API will be available at: http://localhost:5000")
+    print(f"API will be available at: http://localhost:{args.port}")
     print("Press Ctrl+C to stop the server")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    
+    if args.prefork and hasattr(os, 'fork'):
+        from prefork import serve_prefork
+        serve_prefork(
+            app,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            max_requests=args.max_requests,
+            before_fork=reload_model,
+            on_worker_start=watch_model_files,
+            on_worker_exit=shutdown_training_executor
+        )
+    else:
+        if args.prefork:
+            print("Pre-fork mode is not available on this platform; using the development server")
+        app.run(debug=True, host=args.host, port=args.port)
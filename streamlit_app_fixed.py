@@ -4,11 +4,19 @@ Fixed Streamlit Web Application for Credit Card Default Prediction
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import numpy as np
 import json
 import os
+import time
 import pickle
+import hashlib
+import tempfile
+from sklearn.ensemble import RandomForestClassifier
+from forest_engine import CompiledForest
+from model_artifact import ARTIFACT_PATH, load_artifact
+from score_csv import ResultWriter, read_chunks
 
 # Page configuration
 st.set_page_config(
@@ -21,23 +29,61 @@ st.set_page_config(
 # API base URL (configurable via secrets or env)
 DEFAULT_API_BASE_URL = st.secrets.get("API_BASE_URL", os.getenv("API_BASE_URL", ""))
 
+# Rows scored per request/chunk on the batch scoring page
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "20000"))
+
+# Distinct uploaded model bundles kept unpickled in memory
+UPLOADED_MODEL_CACHE_ENTRIES = int(os.getenv("UPLOADED_MODEL_CACHE_ENTRIES", "3"))
+
+# Seconds a health check result is reused across reruns
+HEALTH_CACHE_TTL = int(os.getenv("HEALTH_CACHE_TTL", "10"))
+
+@st.cache_resource
+def get_http_session():
+    """Keep-alive HTTP session shared by every rerun and browser session
+
+    Reusing pooled connections saves a TCP (and TLS) handshake per call.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 def check_api_health(api_base_url: str):
     """Check if the API is running"""
     try:
         if not api_base_url:
             return False, None
-        response = requests.get(f"{api_base_url}/health", timeout=5)
+        response = get_http_session().get(f"{api_base_url}/health", timeout=5)
         return response.status_code == 200, response.json() if response.status_code == 200 else None
     except:
         return False, None
 
-def train_model(api_base_url: str):
-    """Train the model via API"""
+@st.cache_data(ttl=HEALTH_CACHE_TTL, show_spinner=False)
+def cached_api_health(api_base_url: str):
+    """check_api_health, reused for HEALTH_CACHE_TTL seconds so reruns do not wait on it"""
+    return check_api_health(api_base_url)
+
+def train_model(api_base_url: str, timeout: int = 600):
+    """Train the model via API (starts a background job and waits for it)"""
     try:
         if not api_base_url:
             return False, {"error": "API base URL not set"}
-        response = requests.post(f"{api_base_url}/train", timeout=60)
-        return response.status_code == 200, response.json() if response.status_code == 200 else response.json()
+        session = get_http_session()
+        response = session.post(f"{api_base_url}/train", timeout=10)
+        if response.status_code != 202:
+            return False, response.json()
+        job_id = response.json()["job_id"]
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = session.get(f"{api_base_url}/train/{job_id}", timeout=10).json()["job"]
+            if job["state"] == "succeeded":
+                return True, job
+            if job["state"] == "failed":
+                return False, {"message": job.get("error") or "Training job failed"}
+            time.sleep(1)
+        return False, {"message": f"Training job {job_id} did not finish within {timeout}s"}
     except Exception as e:
         return False, {"error": str(e)}
 
@@ -46,7 +92,7 @@ def predict_single_api(api_base_url: str, data):
     try:
         if not api_base_url:
             return False, {"error": "API base URL not set"}
-        response = requests.post(f"{api_base_url}/predict", json=data, timeout=10)
+        response = get_http_session().post(f"{api_base_url}/predict", json=data, timeout=10)
         return response.status_code == 200, response.json() if response.status_code == 200 else response.json()
     except Exception as e:
         return False, {"error": str(e)}
@@ -55,6 +101,15 @@ def predict_single_api(api_base_url: str, data):
 def load_local_model():
     """Load local model artifact for offline predictions"""
     model_path = "credit_card_model.pkl"
+    # Prefer the memory-mapped artifact (no unpickling) when it is current
+    if os.path.exists(ARTIFACT_PATH) and (
+        not os.path.exists(model_path) or os.path.getmtime(ARTIFACT_PATH) >= os.path.getmtime(model_path)
+    ):
+        try:
+            forest, header = load_artifact(ARTIFACT_PATH, fused=True)
+            return {"model": None, "scaler": None, "feature_columns": header["feature_columns"], "engine": forest}
+        except Exception:
+            pass
     if not os.path.exists(model_path):
         return None
     with open(model_path, "rb") as f:
@@ -62,6 +117,32 @@ def load_local_model():
     # Expecting keys: model, scaler, feature_columns
     if not all(k in model_data for k in ["model", "scaler", "feature_columns"]):
         return None
+    return attach_fused_engine(model_data)
+
+@st.cache_resource(max_entries=UPLOADED_MODEL_CACHE_ENTRIES, show_spinner="Loading uploaded model...")
+def load_uploaded_model(content_hash: str, _uploaded_model):
+    """Unpickle and validate an uploaded model bundle once per distinct file
+
+    Cached by `content_hash` (the file's SHA-256); the upload itself is
+    not hashed by Streamlit. Returns (model_data, error message).
+    """
+    try:
+        _uploaded_model.seek(0)
+        model_data = pickle.load(_uploaded_model)
+    except Exception as e:
+        return None, f"Failed to read uploaded model: {e}"
+    if not isinstance(model_data, dict) or not all(k in model_data for k in ["model", "scaler", "feature_columns"]):
+        return None, "Uploaded file is missing required keys: model, scaler, feature_columns"
+    return attach_fused_engine(model_data), None
+
+def attach_fused_engine(model_data):
+    """Add a fused forest (scaler folded into thresholds) to a model bundle"""
+    if isinstance(model_data["model"], RandomForestClassifier):
+        try:
+            forest = CompiledForest.from_sklearn(model_data["model"], model_data["scaler"])
+            model_data["engine"] = forest.fuse_scaler()
+        except Exception:
+            pass
     return model_data
 
 def predict_single_local(model_data, data):
@@ -75,9 +156,13 @@ def predict_single_local(model_data, data):
         if missing:
             return False, {"message": f"Missing features: {sorted(list(missing))}"}
         df = df[feature_columns]
-        X = scaler.transform(df)
-        pred = int(model.predict(X)[0])
-        proba = model.predict_proba(X)[0]
+        if model_data.get("engine") is not None:
+            preds, probas = model_data["engine"].predict_with_proba(df)
+            pred, proba = int(preds[0]), probas[0]
+        else:
+            X = scaler.transform(df)
+            pred = int(model.predict(X)[0])
+            proba = model.predict_proba(X)[0]
         return True, {
             "prediction": pred,
             "probability": {"no_default": float(proba[0]), "default": float(proba[1])}
@@ -85,6 +170,116 @@ def predict_single_local(model_data, data):
     except Exception as e:
         return False, {"message": str(e)}
 
+def get_api_feature_columns(api_base_url: str):
+    """Feature columns of the model the API is serving"""
+    response = get_http_session().get(f"{api_base_url}/features", timeout=10)
+    result = response.json()
+    if response.status_code != 200:
+        raise RuntimeError(result.get("message", "Could not read the API feature list"))
+    return [feature["name"] for feature in result["features"]]
+
+def predict_batch_api(api_base_url: str, feature_columns, matrix):
+    """Score a feature matrix with one columnar /batch_predict call"""
+    body = {"columns": {name: matrix[:, j].tolist() for j, name in enumerate(feature_columns)}}
+    response = get_http_session().post(f"{api_base_url}/batch_predict", json=body, timeout=120)
+    result = response.json()
+    if response.status_code != 200:
+        raise RuntimeError(result.get("message", "Batch prediction failed"))
+    predictions = result["predictions"]
+    probas = np.column_stack((predictions["no_default"], predictions["default"]))
+    return np.asarray(predictions["prediction"]), probas
+
+def predict_batch_local(model_data, matrix):
+    """Score a feature matrix (feature_columns order) with the local model"""
+    if model_data.get("engine") is not None:
+        return model_data["engine"].predict_with_proba(matrix)
+    model = model_data["model"]
+    probas = model.predict_proba(model_data["scaler"].transform(matrix))
+    return model.classes_.take(np.argmax(probas, axis=1)), probas
+
+def score_uploaded_csv(uploaded_csv, feature_columns, score_chunk, progress):
+    """Score an uploaded CSV chunk by chunk and return the scored CSV bytes
+
+    Results are appended to a temporary file as each chunk finishes, so only
+    one chunk of scores is built at a time. The finished file is read once
+    into the download payload and deleted, even when scoring is interrupted.
+    """
+    fd, output_path = tempfile.mkstemp(prefix="credit_scores_", suffix=".csv")
+    os.close(fd)
+    started = time.time()
+    rows = defaults = 0
+    try:
+        writer = ResultWriter(output_path)
+        try:
+            for ids, matrix in read_chunks(uploaded_csv, feature_columns, BATCH_CHUNK_SIZE):
+                preds, probas = score_chunk(matrix)
+                writer.write(ids, rows, preds, probas)
+                rows += len(preds)
+                defaults += int(np.count_nonzero(np.asarray(preds) == 1))
+                fraction = min(uploaded_csv.tell() / max(uploaded_csv.size, 1), 1.0)
+                progress.progress(fraction, text=f"{rows:,} rows scored")
+        finally:
+            writer.close()
+        with open(output_path, "rb") as f:
+            data = f.read()
+    finally:
+        os.remove(output_path)
+    progress.progress(1.0, text=f"{rows:,} rows scored")
+    return {
+        "data": data,
+        "file_name": f"{os.path.splitext(uploaded_csv.name)[0]}_scores.csv",
+        "rows": rows,
+        "defaults": defaults,
+        "seconds": time.time() - started
+    }
+
+def batch_scoring_page(api_base_url: str, api_healthy: bool, local_model_data):
+    """Upload a CSV of accounts, score it in chunks and download the results"""
+    st.header("Batch Scoring")
+    st.caption(f"Upload a CSV shaped like UCI_Credit_Card.csv. It is scored in chunks of {BATCH_CHUNK_SIZE:,} rows "
+               "and the results (ID, prediction, class probabilities) are written to a downloadable CSV.")
+
+    if api_healthy:
+        st.info("Scoring via the API (/batch_predict)")
+    elif local_model_data is not None:
+        st.info("Scoring with the local model")
+    else:
+        st.warning("⚠️ No model loaded")
+        return
+
+    uploaded_csv = st.file_uploader("Accounts CSV", type=["csv"])
+    # Results belong to the file they were scored from; a new (or removed)
+    # upload drops them
+    upload_id = uploaded_csv.file_id if uploaded_csv is not None else None
+    if st.session_state.get("batch_upload_id") != upload_id:
+        st.session_state.pop("batch_result", None)
+        st.session_state["batch_upload_id"] = upload_id
+
+    if uploaded_csv is not None and st.button("📊 Score File", type="primary"):
+        # Drop the previous results first so only one scored file is held
+        st.session_state.pop("batch_result", None)
+
+        progress = st.progress(0.0, text="Scoring...")
+        try:
+            if api_healthy:
+                feature_columns = get_api_feature_columns(api_base_url)
+                score_chunk = lambda matrix: predict_batch_api(api_base_url, feature_columns, matrix)
+            else:
+                feature_columns = list(local_model_data["feature_columns"])
+                score_chunk = lambda matrix: predict_batch_local(local_model_data, matrix)
+            st.session_state["batch_result"] = score_uploaded_csv(uploaded_csv, feature_columns, score_chunk, progress)
+        except Exception as e:
+            st.error(f"❌ Batch scoring failed: {e}")
+
+    result = st.session_state.get("batch_result")
+    if result is not None:
+        st.success(f"✅ Scored {result['rows']:,} rows in {result['seconds']:.1f}s")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Records", f"{result['rows']:,}")
+        col2.metric("Predicted Defaults", f"{result['defaults']:,}")
+        col3.metric("Default Rate", f"{result['defaults'] / max(result['rows'], 1):.2%}")
+        st.download_button("⬇️ Download Scores", result["data"], file_name=result["file_name"], mime="text/csv")
+
 def main():
     """Main Streamlit application"""
     
@@ -94,6 +289,7 @@ def main():
     
     # Sidebar
     with st.sidebar:
+        page = st.radio("Page", ["Single Prediction", "Batch Scoring"])
         st.header("🔧 Configuration")
         api_base_url = st.text_input("API Base URL", value=DEFAULT_API_BASE_URL, placeholder="https://your-api-host/api")
         use_local_fallback = st.toggle("Use local model if API unavailable", value=True)
@@ -102,8 +298,8 @@ def main():
         if use_local_fallback and not api_base_url:
             uploaded_model = st.file_uploader("Upload credit_card_model.pkl", type=["pkl"], help="Upload the trained model bundle with keys: model, scaler, feature_columns")
 
-    # Check API health (non-blocking)
-    api_healthy, health_data = check_api_health(api_base_url)
+    # Check API health (cached for a few seconds across reruns)
+    api_healthy, health_data = cached_api_health(api_base_url)
 
     if api_healthy:
         st.info("API connected")
@@ -118,14 +314,11 @@ def main():
     if use_local_fallback and not api_healthy:
         # Prefer uploaded model if provided
         if uploaded_model is not None:
-            try:
-                model_data = pickle.load(uploaded_model)
-                if all(k in model_data for k in ["model", "scaler", "feature_columns"]):
-                    local_model_data = model_data
-                else:
-                    st.error("Uploaded file is missing required keys: model, scaler, feature_columns")
-            except Exception as e:
-                st.error(f"Failed to read uploaded model: {e}")
+            # Reruns reuse the bundle already unpickled for the same file
+            content_hash = hashlib.sha256(uploaded_model.getbuffer()).hexdigest()
+            local_model_data, error = load_uploaded_model(content_hash, uploaded_model)
+            if error:
+                st.error(error)
         if local_model_data is None:
             local_model_data = load_local_model()
         if local_model_data is None:
@@ -145,10 +338,16 @@ def main():
                 success, result = train_model(api_base_url)
                 if success:
                     st.success("✅ Model trained successfully!")
+                    # The cached health result still says which model was loaded before
+                    cached_api_health.clear()
                     st.rerun()
                 else:
                     st.error(f"❌ Training failed: {result.get('message', 'Unknown error')}")
     
+    if page == "Batch Scoring":
+        batch_scoring_page(api_base_url, api_healthy, local_model_data)
+        return
+    
     # Main content
     st.header("Single Credit Card Default Prediction")
     
@@ -290,6 +489,7 @@ def main():
             success, result = train_model(api_base_url)
             if success:
                 st.success("✅ Model trained successfully!")
+                cached_api_health.clear()
             else:
                 st.error(f"❌ Training failed: {result.get('message', 'Unknown error')}")
 
@@ -3,11 +3,39 @@ Simple test script for the Credit Card Default Prediction API
 """
 
 import requests
+import io
 import json
 import time
+import numpy as np
 
 API_BASE_URL = "http://localhost:5000/api"
 
+SAMPLE_RECORD = {
+    "LIMIT_BAL": 20000,
+    "SEX": 1,
+    "EDUCATION": 1,
+    "MARRIAGE": 1,
+    "AGE": 30,
+    "PAY_0": 0,
+    "PAY_2": 0,
+    "PAY_3": 0,
+    "PAY_4": 0,
+    "PAY_5": 0,
+    "PAY_6": 0,
+    "BILL_AMT1": 1000,
+    "BILL_AMT2": 1000,
+    "BILL_AMT3": 1000,
+    "BILL_AMT4": 1000,
+    "BILL_AMT5": 1000,
+    "BILL_AMT6": 1000,
+    "PAY_AMT1": 1000,
+    "PAY_AMT2": 1000,
+    "PAY_AMT3": 1000,
+    "PAY_AMT4": 1000,
+    "PAY_AMT5": 1000,
+    "PAY_AMT6": 1000
+}
+
 def test_health():
     """Test health endpoint"""
     try:
@@ -20,16 +48,41 @@ def test_health():
         print(f"Health check failed: {e}")
         return False
 
+def wait_for_job(job_id):
+    """Poll a training job until it finishes; True when it succeeded"""
+    for _ in range(300):
+        job = requests.get(f"{API_BASE_URL}/train/{job_id}", timeout=5).json()['job']
+        if job['state'] in ('succeeded', 'failed'):
+            print(f"Job finished: {job['state']} - metrics: {job['metrics']}")
+            return job['state'] == 'succeeded'
+        print(f"  {job['stage']} ({job['progress']:.0%})")
+        time.sleep(1)
+    return False
+
 def test_train():
-    """Test model training"""
+    """Test model training (background job)"""
     try:
-        response = requests.post(f"{API_BASE_URL}/train", timeout=60)
+        response = requests.post(f"{API_BASE_URL}/train", timeout=10)
         print(f"Train Model - Status: {response.status_code}")
+        if response.status_code != 202:
+            return False
+        job_id = response.json()['job_id']
+        print(f"Training job: {job_id}")
+        return wait_for_job(job_id)
+    except Exception as e:
+        print(f"Train model failed: {e}")
+        return False
+
+def test_reload():
+    """Test reloading the model from disk"""
+    try:
+        response = requests.post(f"{API_BASE_URL}/reload", timeout=60)
+        print(f"Reload Model - Status: {response.status_code}")
         if response.status_code == 200:
-            print(f"Response: {response.json()}")
+            print(f"Model version: {response.json()['model']['version']}")
         return response.status_code == 200
     except Exception as e:
-        print(f"Train model failed: {e}")
+        print(f"Reload model failed: {e}")
         return False
 
 def test_features():
@@ -47,34 +100,8 @@ def test_features():
 
 def test_prediction():
     """Test single prediction"""
-    sample_data = {
-        "LIMIT_BAL": 20000,
-        "SEX": 1,
-        "EDUCATION": 1,
-        "MARRIAGE": 1,
-        "AGE": 30,
-        "PAY_0": 0,
-        "PAY_2": 0,
-        "PAY_3": 0,
-        "PAY_4": 0,
-        "PAY_5": 0,
-        "PAY_6": 0,
-        "BILL_AMT1": 1000,
-        "BILL_AMT2": 1000,
-        "BILL_AMT3": 1000,
-        "BILL_AMT4": 1000,
-        "BILL_AMT5": 1000,
-        "BILL_AMT6": 1000,
-        "PAY_AMT1": 1000,
-        "PAY_AMT2": 1000,
-        "PAY_AMT3": 1000,
-        "PAY_AMT4": 1000,
-        "PAY_AMT5": 1000,
-        "PAY_AMT6": 1000
-    }
-    
     try:
-        response = requests.post(f"{API_BASE_URL}/predict", json=sample_data, timeout=10)
+        response = requests.post(f"{API_BASE_URL}/predict", json=SAMPLE_RECORD, timeout=10)
         print(f"Single Prediction - Status: {response.status_code}")
         if response.status_code == 200:
             data = response.json()
@@ -87,6 +114,83 @@ def test_prediction():
         print(f"Prediction failed: {e}")
         return False
 
+def test_columnar_batch():
+    """Test columnar batch prediction (one array per feature)"""
+    body = {"columns": {name: [value, value] for name, value in SAMPLE_RECORD.items()}}
+    try:
+        response = requests.post(f"{API_BASE_URL}/batch_predict", json=body, timeout=10)
+        print(f"Columnar Batch - Status: {response.status_code}")
+        if response.status_code == 200:
+            print(f"Predictions: {response.json()['predictions']['prediction']}")
+        else:
+            print(f"Error: {response.json()}")
+        return response.status_code == 200 and response.json()['total_records'] == 2
+    except Exception as e:
+        print(f"Columnar batch failed: {e}")
+        return False
+
+def test_npy_batch():
+    """Test NPY batch prediction (rows in feature_columns order)"""
+    try:
+        features = requests.get(f"{API_BASE_URL}/features", timeout=10).json()['features']
+        feature_columns = [feature['name'] for feature in features]
+        buffer = io.BytesIO()
+        np.save(buffer, np.array([[SAMPLE_RECORD[name] for name in feature_columns]] * 3, dtype=np.float64))
+        response = requests.post(f"{API_BASE_URL}/batch_predict", data=buffer.getvalue(),
+                                 headers={"Content-Type": "application/x-npy"}, timeout=10)
+        print(f"NPY Batch - Status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"Error: {response.text}")
+            return False
+        results = np.load(io.BytesIO(response.content))
+        print(f"Predictions: {results['prediction'].tolist()}")
+        return len(results) == 3
+    except Exception as e:
+        print(f"NPY batch failed: {e}")
+        return False
+
+def test_stream_prediction():
+    """Test NDJSON streaming prediction, including records the model cannot score"""
+    lines = [
+        json.dumps(SAMPLE_RECORD),
+        json.dumps(dict(SAMPLE_RECORD, AGE=None)),        # missing value: scored
+        json.dumps(dict(SAMPLE_RECORD, AGE=float("inf"))),  # infinity: error line
+        json.dumps(SAMPLE_RECORD)
+    ]
+    try:
+        response = requests.post(f"{API_BASE_URL}/stream_predict", data="\n".join(lines) + "\n",
+                                  headers={"Content-Type": "application/x-ndjson"}, timeout=30)
+        print(f"Stream Prediction - Status: {response.status_code}")
+        results = [json.loads(line) for line in response.text.splitlines() if line]
+        for result in results:
+            print(f"  record {result['record_id']}: {result.get('status', 'ok')} {result.get('prediction', result.get('message'))}")
+        statuses = [result.get('status', 'ok') for result in results]
+        return response.status_code == 200 and statuses == ['ok', 'ok', 'error', 'ok']
+    except Exception as e:
+        print(f"Stream prediction failed: {e}")
+        return False
+
+def test_models_prediction():
+    """Test multi-model prediction (trains a small model suite if none is loaded)"""
+    try:
+        if requests.get(f"{API_BASE_URL}/models", timeout=10).status_code != 200:
+            response = requests.post(f"{API_BASE_URL}/train", timeout=10,
+                                     json={"suite": True, "models": ["logistic_regression", "random_forest"]})
+            print(f"Train Model Suite - Status: {response.status_code}")
+            if response.status_code != 202 or not wait_for_job(response.json()['job_id']):
+                return False
+        response = requests.post(f"{API_BASE_URL}/models/predict?ensemble=average", json=SAMPLE_RECORD, timeout=30)
+        print(f"Models Prediction - Status: {response.status_code}")
+        if response.status_code == 200:
+            data = response.json()
+            print(f"Models: {list(data['models'])}, ensemble: {data['ensemble']['probabilities']}")
+        else:
+            print(f"Error: {response.json()}")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"Models prediction failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("=" * 50)
@@ -118,6 +222,26 @@ def main():
     print("\n4. Testing Single Prediction...")
     prediction_ok = test_prediction()
     
+    # Test 5: Reload Model
+    print("\n5. Testing Model Reload...")
+    reload_ok = test_reload()
+    
+    # Test 6: Columnar Batch Prediction
+    print("\n6. Testing Columnar Batch Prediction...")
+    columnar_ok = test_columnar_batch()
+    
+    # Test 7: NPY Batch Prediction
+    print("\n7. Testing NPY Batch Prediction...")
+    npy_ok = test_npy_batch()
+    
+    # Test 8: Streaming Prediction
+    print("\n8. Testing Streaming Prediction...")
+    stream_ok = test_stream_prediction()
+    
+    # Test 9: Multi-Model Prediction
+    print("\n9. Testing Multi-Model Prediction...")
+    models_ok = test_models_prediction()
+    
     # Summary
     print("\n" + "=" * 50)
     print("Test Summary:")
@@ -125,6 +249,11 @@ def main():
     print(f"Model Training: {'✅ PASS' if train_ok else '❌ FAIL'}")
     print(f"Get Features: {'✅ PASS' if features_ok else '❌ FAIL'}")
     print(f"Prediction: {'✅ PASS' if prediction_ok else '❌ FAIL'}")
+    print(f"Model Reload: {'✅ PASS' if reload_ok else '❌ FAIL'}")
+    print(f"Columnar Batch: {'✅ PASS' if columnar_ok else '❌ FAIL'}")
+    print(f"NPY Batch: {'✅ PASS' if npy_ok else '❌ FAIL'}")
+    print(f"Stream Prediction: {'✅ PASS' if stream_ok else '❌ FAIL'}")
+    print(f"Multi-Model Prediction: {'✅ PASS' if models_ok else '❌ FAIL'}")
     print("=" * 50)
 
 if __name__ == "__main__":
@@ -0,0 +1,648 @@
+"""
+Training pipeline for Credit Card Default Prediction
+
+Same steps as the notebook: read the CSV, drop ID, split, standardize and
+fit a Random Forest. Kept free of Flask/Streamlit imports so it can run in
+a worker process next to the API.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.ensemble import (AdaBoostClassifier, BaggingClassifier,
+                              GradientBoostingClassifier, RandomForestClassifier)
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import HalvingGridSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from forest_engine import fold_thresholds
+from xgboost_engine import xgboost
+from model_artifact import ARTIFACT_PATH, save_artifact
+from model_bundle import model_version
+
+DATASET_PATH = 'UCI_Credit_Card.csv'
+MODEL_PATH = 'credit_card_model.pkl'
+SUITE_PATH = 'credit_card_models.pkl'
+TARGET_COLUMN = 'default.payment.next.month'
+
+# Parsed and split training data, keyed by the CSV's content hash and the
+# split parameters (see load_training_split)
+DATA_CACHE_DIR = os.getenv('TRAINING_CACHE_DIR', '.training_cache')
+DATA_CACHE_VERSION = 1
+MAX_CACHED_SPLITS = 4
+
+# Trees added per fitting step, so long fits can report progress
+TREES_PER_STEP = 10
+
+# Trees grown on each new data segment by incremental_update()
+INCREMENTAL_TREES = 20
+
+# Hyperparameter search: candidates start with SEARCH_MIN_TREES trees and
+# only the best 1/SEARCH_FACTOR of them move on to SEARCH_FACTOR times as
+# many trees, up to SEARCH_MAX_TREES
+SEARCH_PARAM_GRID = {
+    'model__max_depth': [6, 10, 14, None],
+    'model__min_samples_leaf': [1, 5, 20],
+    'model__max_features': ['sqrt', 0.5],
+}
+SEARCH_MIN_TREES = 10
+SEARCH_MAX_TREES = 150
+SEARCH_FACTOR = 3
+SEARCH_CV = 3
+SEARCH_SCORING = 'roc_auc'
+SEARCH_N_JOBS = int(os.getenv('SEARCH_N_JOBS', '-1'))
+
+# Models of the multi-model suite, with the notebook's settings. Each entry
+# builds an unfitted estimator from a random_state.
+SUITE_MODELS = {
+    'logistic_regression': lambda random_state: LogisticRegression(max_iter=500),
+    'random_forest': lambda random_state: RandomForestClassifier(
+        n_estimators=100, max_depth=10, random_state=random_state),
+    'bagging': lambda random_state: BaggingClassifier(
+        estimator=DecisionTreeClassifier(random_state=random_state),
+        n_estimators=100, random_state=random_state),
+    'adaboost': lambda random_state: AdaBoostClassifier(
+        estimator=DecisionTreeClassifier(max_depth=3, random_state=random_state),
+        n_estimators=200, learning_rate=0.1, random_state=random_state),
+    'gradient_boosting': lambda random_state: GradientBoostingClassifier(
+        n_estimators=200, learning_rate=0.1, max_depth=3, random_state=random_state),
+}
+if xgboost is not None:
+    SUITE_MODELS['xgboost'] = lambda random_state: xgboost.XGBClassifier(random_state=random_state)
+
+# Model families fit_model_bundle() can train as the main served model
+MODEL_TYPES = ('random_forest', 'xgboost', 'logistic_regression')
+
+# Progress queue shared with the parent process (set by init_worker)
+_progress_queue = None
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hex sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_split(csv_path, test_size=0.2, random_state=42):
+    """Parse the CSV and split it as the notebook does
+
+    Returns (X_train, X_test, y_train, y_test).
+    """
+    # Read the dataset (same as notebook)
+    df = pd.read_csv(csv_path)
+
+    # Drop ID column
+    df = df.drop('ID', axis=1)
+
+    # Separate features and target variable
+    X = df.drop(TARGET_COLUMN, axis=1)
+    y = df[TARGET_COLUMN]
+
+    # Split data into training and testing sets
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+def load_training_split(csv_path=DATASET_PATH, test_size=0.2, random_state=42,
+                        cache_dir=DATA_CACHE_DIR):
+    """read_split() with an on-disk cache of the resulting arrays
+
+    Each split is stored as .npy files plus a small JSON file with column
+    names, dtypes and row labels, under a key built from the CSV's sha256
+    and the split parameters. A retrain on an unchanged file loads those
+    instead of parsing and splitting the CSV again, and gets back frames
+    identical to a fresh read. Pass cache_dir=None to disable the cache.
+    """
+    if not cache_dir:
+        return read_split(csv_path, test_size, random_state)
+
+    key = hashlib.sha256(json.dumps({
+        'csv_sha256': file_sha256(csv_path),
+        'test_size': test_size,
+        'random_state': random_state,
+        'cache_version': DATA_CACHE_VERSION
+    }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    entry = os.path.join(cache_dir, key)
+
+    if os.path.exists(os.path.join(entry, 'meta.json')):
+        try:
+            split = _read_cached_split(entry)
+            os.utime(entry)
+            return split
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable training data cache {entry}: {e}")
+
+    split = read_split(csv_path, test_size, random_state)
+    try:
+        _write_cached_split(cache_dir, entry, split)
+    except OSError as e:
+        print(f"Could not cache training data in {cache_dir}: {e}")
+    return split
+
+
+def _write_cached_split(cache_dir, entry, split):
+    X_train, X_test, y_train, y_test = split
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write into a private directory and rename it into place, so a
+    # concurrent reader never sees a half-written entry
+    tmp_entry = tempfile.mkdtemp(prefix='.tmp-', dir=cache_dir)
+    try:
+        for name, array in (('X_train', X_train.to_numpy(dtype=np.float64)),
+                            ('X_test', X_test.to_numpy(dtype=np.float64)),
+                            ('y_train', y_train.to_numpy()),
+                            ('y_test', y_test.to_numpy()),
+                            ('train_index', X_train.index.to_numpy()),
+                            ('test_index', X_test.index.to_numpy())):
+            np.save(os.path.join(tmp_entry, f'{name}.npy'), array, allow_pickle=False)
+        with open(os.path.join(tmp_entry, 'meta.json'), 'w') as f:
+            json.dump({
+                'columns': X_train.columns.tolist(),
+                'dtypes': [str(dtype) for dtype in X_train.dtypes],
+                'target': y_train.name
+            }, f)
+        os.replace(tmp_entry, entry)
+    except OSError:
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        if not os.path.exists(entry):
+            raise
+
+    # Keep only the most recently used entries
+    entries = sorted(
+        (os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if not name.startswith('.')),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    for old_entry in entries[MAX_CACHED_SPLITS:]:
+        shutil.rmtree(old_entry, ignore_errors=True)
+
+
+def _read_cached_split(entry):
+    with open(os.path.join(entry, 'meta.json')) as f:
+        meta = json.load(f)
+
+    def load(name):
+        return np.load(os.path.join(entry, f'{name}.npy'), allow_pickle=False)
+
+    dtypes = dict(zip(meta['columns'], meta['dtypes']))
+    split = []
+    for part, index_name in (('train', 'train_index'), ('test', 'test_index')):
+        index = pd.Index(load(index_name))
+        X = pd.DataFrame(load(f'X_{part}'), columns=meta['columns'], index=index).astype(dtypes)
+        y = pd.Series(load(f'y_{part}'), index=index, name=meta['target'])
+        split.append((X, y))
+    (X_train, y_train), (X_test, y_test) = split
+    return X_train, X_test, y_train, y_test
+
+
+def search_hyperparameters(X_train, y_train, random_state=42):
+    """Successive-halving search over SEARCH_PARAM_GRID; returns (params, summary)
+
+    Candidates are scored with cross-validation on few trees first, and
+    only the best ones are re-evaluated with more trees, so poor settings
+    are dropped cheaply. Folds are evaluated in parallel worker processes,
+    and the scaler fitted on each fold is cached on disk by the pipeline
+    so candidates reuse it instead of re-scaling the same split.
+    """
+    with tempfile.TemporaryDirectory(prefix='creditcard-search-') as cache_dir:
+        pipeline = Pipeline(
+            [('scaler', StandardScaler()),
+             ('model', RandomForestClassifier(random_state=random_state))],
+            memory=Memory(cache_dir, verbose=0)
+        )
+        search = HalvingGridSearchCV(
+            pipeline,
+            SEARCH_PARAM_GRID,
+            resource='model__n_estimators',
+            min_resources=SEARCH_MIN_TREES,
+            max_resources=SEARCH_MAX_TREES,
+            factor=SEARCH_FACTOR,
+            cv=SEARCH_CV,
+            scoring=SEARCH_SCORING,
+            refit=False,
+            n_jobs=SEARCH_N_JOBS,
+            random_state=random_state
+        )
+        search.fit(X_train, y_train)
+
+    # The tree count is the halving resource, not a tuned setting: the
+    # final forest is grown to the requested size with the winning params
+    params = {name.split('__', 1)[1]: value for name, value in search.best_params_.items()}
+    trees_evaluated = params.pop('n_estimators')
+    summary = {
+        'scoring': SEARCH_SCORING,
+        'best_score': float(search.best_score_),
+        'trees_evaluated': int(trees_evaluated),
+        'n_candidates': int(search.n_candidates_[0]),
+        'n_iterations': int(search.n_iterations_),
+        'cv': SEARCH_CV
+    }
+    return params, summary
+
+
+def _fit_forest(X_train_scaled, y_train, hyperparameters, random_state, report, fit_start):
+    """Create and train the Random Forest model (best performing from notebook)
+
+    Trees are grown in steps with warm_start; sklearn draws the per-tree
+    seeds the same way, so the result matches a single fit.
+    """
+    n_estimators = hyperparameters['n_estimators']
+    model = RandomForestClassifier(n_estimators=0, random_state=random_state,
+                                   max_depth=hyperparameters['max_depth'],
+                                   min_samples_leaf=hyperparameters['min_samples_leaf'],
+                                   max_features=hyperparameters['max_features'],
+                                   warm_start=True)
+    while model.n_estimators < n_estimators:
+        model.n_estimators = min(model.n_estimators + TREES_PER_STEP, n_estimators)
+        model.fit(X_train_scaled, y_train)
+        report('fitting trees', fit_start + (0.9 - fit_start) * model.n_estimators / n_estimators)
+    model.warm_start = False
+    return model
+
+
+def fit_model_bundle(csv_path=DATASET_PATH, n_estimators=100, max_depth=10,
+                     random_state=42, progress=None, search=False, model_type='random_forest'):
+    """Fit scaler + Random Forest and return (model_data, metrics)
+
+    With `search=True` the forest settings come from
+    search_hyperparameters() instead of the arguments. With
+    model_type='xgboost' or 'logistic_regression' the notebook's
+    XGBClassifier or LogisticRegression is fitted instead.
+    `progress(stage, fraction)` is called as training advances.
+    """
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f'Unknown model type: {model_type}. Use one of {list(MODEL_TYPES)}')
+    if model_type == 'xgboost' and xgboost is None:
+        raise ValueError('xgboost is not installed')
+    if model_type != 'random_forest' and search:
+        raise ValueError('Hyperparameter search is only available for random_forest')
+
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    started = time.time()
+
+    # Read and split the dataset (same as notebook), reusing the cached
+    # split when the CSV has not changed
+    report('reading data', 0.0)
+    X_train, X_test, y_train, y_test = load_training_split(csv_path, random_state=random_state)
+
+    hyperparameters = {
+        'n_estimators': n_estimators,
+        'max_depth': max_depth,
+        'min_samples_leaf': 1,
+        'max_features': 'sqrt'
+    }
+    fit_start = 0.1
+    if search:
+        report('searching hyperparameters', 0.1)
+        best_params, search_summary = search_hyperparameters(X_train, y_train, random_state)
+        hyperparameters.update(best_params)
+        hyperparameters['search'] = search_summary
+        fit_start = 0.6
+
+    # Standardize numerical features
+    report('preprocessing', max(fit_start - 0.05, 0.05))
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    if model_type == 'xgboost':
+        report('fitting boosted trees', fit_start)
+        model = xgboost.XGBClassifier(random_state=random_state)
+        model.fit(X_train_scaled, y_train)
+        n_estimators = model.get_booster().num_boosted_rounds()
+        hyperparameters = {'model_type': 'xgboost', 'n_estimators': n_estimators}
+    elif model_type == 'logistic_regression':
+        report('fitting logistic regression', fit_start)
+        model = SUITE_MODELS['logistic_regression'](random_state)
+        model.fit(X_train_scaled, y_train)
+        n_estimators = 0
+        hyperparameters = {'model_type': 'logistic_regression', 'max_iter': model.max_iter}
+    else:
+        model = _fit_forest(X_train_scaled, y_train, hyperparameters, random_state, report, fit_start)
+        n_estimators = hyperparameters['n_estimators']
+        # Cheap linear screen for cascade scoring (see cascade.py)
+        report('fitting cascade screen', 0.9)
+        screen_model = SUITE_MODELS['logistic_regression'](random_state)
+        screen_model.fit(X_train_scaled, y_train)
+
+    # Evaluate model
+    report('evaluating', 0.9)
+    y_pred = model.predict(X_test_scaled)
+    accuracy = accuracy_score(y_test, y_pred)
+
+    model_data = {
+        'model': model,
+        'scaler': scaler,
+        'feature_columns': X_train.columns.tolist(),
+        'hyperparameters': hyperparameters,
+        'data_segments': [data_segment(csv_path, len(X_train), 0, n_estimators)]
+    }
+    if model_type == 'random_forest':
+        model_data['screen_model'] = screen_model
+    metrics = {
+        'accuracy': float(accuracy),
+        'train_records': int(len(X_train)),
+        'test_records': int(len(X_test)),
+        'n_estimators': int(n_estimators),
+        'max_depth': hyperparameters.get('max_depth'),
+        'hyperparameters': hyperparameters,
+        'training_seconds': round(time.time() - started, 3)
+    }
+    return model_data, metrics
+
+
+def data_segment(csv_path, rows, first_tree, end_tree):
+    """Record of one data file a model has been trained on
+
+    `trees` is the [first, end) range of estimators fitted on it.
+    """
+    return {
+        'source': os.path.basename(csv_path),
+        'sha256': file_sha256(csv_path),
+        'rows': int(rows),
+        'trees': [int(first_tree), int(end_tree)]
+    }
+
+
+def remap_thresholds(model, old_mean, old_scale, new_mean, new_scale, X_reference):
+    """Move every split threshold from one scaling of the features to another
+
+    Each threshold is translated to its exact raw-feature boundary under
+    the old scaler (see forest_engine.fold_thresholds) and rescaled with
+    the new one. Splits can sit within float32 rounding of a data value, so
+    where the rescaled threshold would send the nearest value of
+    `X_reference` (raw rows, e.g. the new data) on either side of the
+    boundary the wrong way, it is nudged back. Existing trees keep making
+    the same decisions on raw inputs, exactly for every value present in
+    `X_reference`.
+    """
+    X_reference = np.asarray(X_reference, dtype=np.float64)
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    internal = [tree.children_left != -1 for tree in trees]
+    feature = np.concatenate([tree.feature[mask] for tree, mask in zip(trees, internal)])
+    threshold = np.concatenate([tree.threshold[mask] for tree, mask in zip(trees, internal)])
+
+    boundary = fold_thresholds(threshold, old_mean[feature], old_scale[feature])
+    remapped = np.empty_like(threshold)
+
+    def rescale(x, f):
+        # Scaled value as sklearn's trees see it (float32)
+        with np.errstate(over='ignore', invalid='ignore'):
+            return ((x - new_mean[f]) / new_scale[f]).astype(np.float32).astype(np.float64)
+
+    for f in np.unique(feature):
+        nodes = np.flatnonzero(feature == f)
+        with np.errstate(over='ignore', invalid='ignore'):
+            result = (boundary[nodes] - new_mean[f]) / new_scale[f]
+
+        # Nearest reference values going left (<= boundary) and right
+        values = np.unique(X_reference[:, f])
+        position = np.searchsorted(values, boundary[nodes], side='right')
+        has_above = position < len(values)
+        has_below = position > 0
+        above = rescale(values[np.minimum(position, len(values) - 1)], f)
+        below = rescale(values[np.maximum(position - 1, 0)], f)
+        result = np.where(has_above & (above <= result), np.nextafter(above, -np.inf), result)
+        result = np.where(has_below & (below > result), below, result)
+        remapped[nodes] = result
+
+    # tree_.threshold is a writable view of the tree's node storage
+    offset = 0
+    for tree, mask in zip(trees, internal):
+        count = int(mask.sum())
+        tree.threshold[mask] = remapped[offset:offset + count]
+        offset += count
+
+
+def remap_linear(model, old_mean, old_scale, new_mean, new_scale):
+    """Move a linear model's coefficients from one scaling of the features to another
+
+    Unlike tree thresholds this is exact: the model computes the same
+    decision function on raw inputs before and after.
+    """
+    coef = model.coef_ / old_scale
+    model.intercept_ = model.intercept_ + coef.dot(new_mean - old_mean)
+    model.coef_ = coef * new_scale
+
+
+def incremental_update(model_data, csv_path, n_new_trees=INCREMENTAL_TREES,
+                       random_state=42, progress=None):
+    """Grow an existing forest on a new data file; returns (model_data, metrics)
+
+    Only the new rows are read: the scaler statistics are updated with
+    partial_fit, the existing trees are remapped to the updated scaling,
+    and `n_new_trees` trees fitted on the new rows are added with
+    warm_start. The cost depends on the size of the new file, not on all
+    data seen so far. The input bundle is not modified.
+    """
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    started = time.time()
+    if not isinstance(model_data.get('model'), RandomForestClassifier):
+        raise ValueError('Incremental training needs a pickled RandomForestClassifier bundle')
+
+    segments = list(model_data.get('data_segments') or [])
+    digest = file_sha256(csv_path)
+    if any(segment['sha256'] == digest for segment in segments):
+        raise ValueError(f'{os.path.basename(csv_path)} has already been used to train this model')
+
+    report('reading data', 0.0)
+    X_train, X_test, y_train, y_test = load_training_split(csv_path, random_state=random_state)
+    feature_columns = list(model_data['feature_columns'])
+    missing = [column for column in feature_columns if column not in X_train.columns]
+    if missing:
+        raise ValueError(f'Missing features: {missing}')
+    X_train, X_test = X_train[feature_columns], X_test[feature_columns]
+
+    model = copy.deepcopy(model_data['model'])
+    scaler = copy.deepcopy(model_data['scaler'])
+    if set(np.unique(y_train)) != set(model.classes_):
+        raise ValueError('New data must contain every class the model predicts')
+
+    # Update the scaler with the new rows and move the old trees onto it
+    report('updating scaler', 0.05)
+    old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+    scaler.partial_fit(X_train)
+    remap_thresholds(model, old_mean, old_scale, scaler.mean_, scaler.scale_,
+                     pd.concat([X_train, X_test]))
+    screen_model = copy.deepcopy(model_data.get('screen_model'))
+    if screen_model is not None:
+        remap_linear(screen_model, old_mean, old_scale, scaler.mean_, scaler.scale_)
+    X_train_scaled = scaler.transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    first_tree = len(model.estimators_)
+    n_estimators = first_tree + n_new_trees
+    model.warm_start = True
+    while model.n_estimators < n_estimators:
+        model.n_estimators = min(model.n_estimators + TREES_PER_STEP, n_estimators)
+        model.fit(X_train_scaled, y_train)
+        report('fitting trees', 0.1 + 0.8 * (model.n_estimators - first_tree) / n_new_trees)
+    model.warm_start = False
+
+    # Evaluate on the held-out part of the new data
+    report('evaluating', 0.9)
+    accuracy = accuracy_score(y_test, model.predict(X_test_scaled))
+
+    hyperparameters = dict(model_data.get('hyperparameters') or {})
+    hyperparameters['n_estimators'] = n_estimators
+    segments.append(data_segment(csv_path, len(X_train), first_tree, n_estimators))
+
+    updated = dict(model_data)
+    updated.update({
+        'model': model,
+        'scaler': scaler,
+        'hyperparameters': hyperparameters,
+        'data_segments': segments
+    })
+    if screen_model is not None:
+        updated['screen_model'] = screen_model
+    metrics = {
+        'accuracy': float(accuracy),
+        'train_records': int(len(X_train)),
+        'test_records': int(len(X_test)),
+        'n_estimators': int(n_estimators),
+        'new_trees': int(n_new_trees),
+        'data_segments': len(segments),
+        'training_seconds': round(time.time() - started, 3)
+    }
+    return updated, metrics
+
+
+def fit_model_suite(csv_path=DATASET_PATH, names=None, random_state=42, progress=None):
+    """Fit several SUITE_MODELS on one shared scaler; returns (suite_data, metrics)
+
+    Every model is trained on the same standardized split, so a serving
+    registry can scale a request once for all of them.
+    """
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    names = list(names or SUITE_MODELS)
+    unknown = [name for name in names if name not in SUITE_MODELS]
+    if unknown:
+        raise ValueError(f'Unknown models: {unknown}. Available: {list(SUITE_MODELS)}')
+
+    started = time.time()
+    report('reading data', 0.0)
+    X_train, X_test, y_train, y_test = load_training_split(csv_path, random_state=random_state)
+
+    report('preprocessing', 0.05)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    models = {}
+    model_metrics = {}
+    for i, name in enumerate(names):
+        report(f'fitting {name}', 0.1 + 0.8 * i / len(names))
+        model_started = time.time()
+        model = SUITE_MODELS[name](random_state)
+        model.fit(X_train_scaled, y_train)
+        probabilities = model.predict_proba(X_test_scaled)
+        models[name] = model
+        model_metrics[name] = {
+            'accuracy': float(accuracy_score(y_test, model.classes_.take(probabilities.argmax(axis=1)))),
+            'roc_auc': float(roc_auc_score(y_test, probabilities[:, 1])),
+            'training_seconds': round(time.time() - model_started, 3)
+        }
+
+    suite_data = {
+        'scaler': scaler,
+        'feature_columns': X_train.columns.tolist(),
+        'models': models,
+        'metrics': model_metrics
+    }
+    metrics = {
+        # Best single model, so job summaries read like a normal training run
+        'accuracy': max(m['accuracy'] for m in model_metrics.values()),
+        'models': model_metrics,
+        'train_records': int(len(X_train)),
+        'test_records': int(len(X_test)),
+        'training_seconds': round(time.time() - started, 3)
+    }
+    return suite_data, metrics
+
+
+def save_model_suite(suite_data, path=SUITE_PATH):
+    """Pickle a model suite atomically"""
+    payload = pickle.dumps(suite_data)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def save_model_bundle(model_data, path=MODEL_PATH, artifact_path=ARTIFACT_PATH):
+    """Pickle the bundle (and write its memory-mapped artifact) atomically
+
+    Readers never see a partial file. The artifact carries the same
+    version id as the pickle so both load as the same model version.
+    """
+    payload = pickle.dumps(model_data)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+    if artifact_path and isinstance(model_data['model'], RandomForestClassifier):
+        save_artifact(artifact_path, model_data, version=model_version(payload))
+
+
+def init_worker(progress_queue):
+    """ProcessPoolExecutor initializer: remember the parent's progress queue"""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def run_training_job(job_id, csv_path=DATASET_PATH, model_path=MODEL_PATH,
+                     artifact_path=ARTIFACT_PATH, search=False, incremental=False,
+                     suite=None, model_type='random_forest'):
+    """Worker-process entry point for a background training job
+
+    With `incremental=True`, `csv_path` holds only new rows and the forest
+    saved at `model_path` is grown on them instead of refitted. With
+    `suite` (a list of SUITE_MODELS names), the multi-model suite is
+    trained and saved to `model_path` instead. Returns only the metrics;
+    the server loads the saved files rather than the pickled result.
+    """
+    def progress(stage, fraction):
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, stage, fraction))
+
+    if suite is not None:
+        suite_data, metrics = fit_model_suite(csv_path, names=suite, progress=progress)
+        progress('saving models', 0.95)
+        save_model_suite(suite_data, model_path)
+        return metrics
+
+    if incremental:
+        with open(model_path, 'rb') as f:
+            base = pickle.load(f)
+        model_data, metrics = incremental_update(base, csv_path, progress=progress)
+    else:
+        model_data, metrics = fit_model_bundle(csv_path, progress=progress, search=search,
+                                               model_type=model_type)
+    progress('saving model', 0.95)
+    save_model_bundle(model_data, model_path, artifact_path)
+    return metrics
@@ -0,0 +1,95 @@
+"""
+XGBoost serving backend
+
+Scores an XGBClassifier through its native Booster with ``inplace_predict``
+on the scaled feature matrix, skipping the sklearn wrapper's checks and
+DMatrix construction. xgboost is optional; without it this backend is
+simply unavailable.
+"""
+
+import os
+
+import numpy as np
+
+try:
+    import xgboost
+except ImportError:  # The XGBoost backend is optional
+    xgboost = None
+
+# Threads used by the booster per prediction call (0 = xgboost default, all
+# cores). Small /api/predict batches are fastest with 1; large batches
+# benefit from more, unless several server workers already share the CPUs.
+XGB_NTHREAD = int(os.getenv('XGB_NTHREAD', '0'))
+
+
+def is_xgboost_model(model):
+    """True for fitted xgboost sklearn-API classifiers"""
+    return xgboost is not None and isinstance(model, xgboost.XGBClassifier)
+
+
+class XGBoostEngine:
+    """Binary XGBClassifier scored through Booster.inplace_predict"""
+
+    fused = False
+    name = 'xgboost'
+
+    def __init__(self, booster, classes, scaler_mean=None, scaler_scale=None,
+                 iteration_range=(0, 0), nthread=XGB_NTHREAD):
+        self.booster = booster
+        self.classes = np.asarray(classes)
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.iteration_range = iteration_range
+        self.nthread = int(nthread)
+        if self.nthread > 0:
+            self.booster.set_param({'nthread': self.nthread})
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None, nthread=XGB_NTHREAD):
+        """Wrap a fitted binary XGBClassifier (and optional StandardScaler)"""
+        if len(model.classes_) != 2 or not str(model.objective).startswith('binary:logistic'):
+            raise ValueError('Only binary:logistic XGBClassifier models are supported')
+
+        # A private copy, so setting nthread does not touch the caller's model
+        booster = model.get_booster().copy()
+        # Match XGBClassifier.predict_proba: stop at the best iteration when
+        # the model was trained with early stopping
+        best_iteration = getattr(model, 'best_iteration', None)
+        iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+
+        scaler_mean = scaler_scale = None
+        if scaler is not None:
+            scaler_mean = np.asarray(scaler.mean_, dtype=np.float64)
+            scaler_scale = np.asarray(scaler.scale_, dtype=np.float64)
+        return cls(booster, model.classes_, scaler_mean, scaler_scale, iteration_range, nthread)
+
+    @property
+    def n_trees(self):
+        return self.booster.num_boosted_rounds()
+
+    def _prepare(self, X):
+        """Apply the scaler (if any); xgboost reads the float32 values it splits on"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.scaler_mean is not None:
+            X = (X - self.scaler_mean) / self.scaler_scale
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict_proba(self, X):
+        """Class probabilities, equivalent to XGBClassifier.predict_proba"""
+        positive = self.booster.inplace_predict(
+            self._prepare(X),
+            iteration_range=self.iteration_range,
+            predict_type='value',
+            validate_features=False
+        )
+        return np.vstack((1 - positive, positive)).T
+
+    def predict_with_proba(self, X):
+        """Return (predictions, probabilities) from a single pass"""
+        probabilities = self.predict_proba(X)
+        return self.classes.take(np.argmax(probabilities, axis=1)), probabilities
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]